@@ -0,0 +1,89 @@
+"""
+Fitness knowledge base used for RAG retrieval.
+
+The knowledge texts are static, so their embeddings are computed once by
+``scripts/build_kb.py`` and loaded from disk at startup instead of running
+the embedding model every time the service starts.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+# Embedding models used for both the knowledge base and incoming queries.
+# The static model2vec model is preferred; sentence-transformers is the fallback.
+STATIC_EMBEDDING_MODEL = "minishlab/potion-base-8M"
+TRANSFORMER_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# Build artifacts written by scripts/build_kb.py
+KB_DIR = Path(__file__).resolve().parent / "kb"
+KB_EMBEDDINGS_PATH = KB_DIR / "kb.npy"
+KB_TEXTS_PATH = KB_DIR / "kb_texts.json"
+
+# Fitness knowledge base
+KNOWLEDGE_TEXTS = [
+    "Drink at least 8 glasses of water daily for hydration.",
+    "For fat loss, a calorie deficit of 300-500 kcal/day is ideal.",
+    "Aim for 150 minutes of moderate exercise weekly.",
+    "Protein intake should be around 1.6-2.2 g/kg of body weight for muscle gain.",
+    "Squats strengthen legs, core, and improve overall stability.",
+    "Rest days are crucial for muscle recovery and growth.",
+    "Cardio exercises like running, cycling help improve cardiovascular health.",
+    "Strength training increases metabolism and bone density.",
+    "A balanced diet includes proteins, carbs, healthy fats, and micronutrients.",
+    "Sleep 7-9 hours per night for optimal recovery and performance.",
+    "Warm-up before exercise prevents injuries and improves performance.",
+    "Progressive overload is key to building muscle and strength.",
+    "HIIT workouts are effective for burning fat in less time.",
+    "Consistency is more important than intensity for long-term results.",
+    "Track your progress with measurements, not just scale weight."
+]
+
+def load_embedder() -> Tuple[Any, str]:
+    """Load the embedding model, returns (model, model_name)"""
+    try:
+        from model2vec import StaticModel
+    except ImportError:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(TRANSFORMER_EMBEDDING_MODEL), TRANSFORMER_EMBEDDING_MODEL
+    
+    return StaticModel.from_pretrained(STATIC_EMBEDDING_MODEL), STATIC_EMBEDDING_MODEL
+
+def knowledge_hash(texts: List[str], model_name: str) -> str:
+    """Fingerprint of the knowledge texts and embedding model, used to detect stale builds"""
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for text in texts:
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+def load_kb_embeddings(model_name: str, texts: List[str] = KNOWLEDGE_TEXTS) -> Optional[np.ndarray]:
+    """Load precomputed knowledge base embeddings, or None if they are missing or stale"""
+    try:
+        metadata = json.loads(KB_TEXTS_PATH.read_text(encoding="utf-8"))
+        if metadata.get("hash") != knowledge_hash(texts, model_name):
+            return None
+        # Read into memory, the index build normalizes the vectors in place
+        embeddings = np.load(KB_EMBEDDINGS_PATH)
+    except (OSError, ValueError):
+        return None
+
+    if embeddings.ndim != 2 or embeddings.shape[0] != len(texts):
+        return None
+    return embeddings.astype("float32", copy=False)
+
+def save_kb_embeddings(embeddings: np.ndarray, model_name: str, texts: List[str] = KNOWLEDGE_TEXTS) -> None:
+    """Write knowledge base embeddings and their metadata to KB_DIR"""
+    KB_DIR.mkdir(parents=True, exist_ok=True)
+    np.save(KB_EMBEDDINGS_PATH, np.asarray(embeddings, dtype="float32"))
+    KB_TEXTS_PATH.write_text(
+        json.dumps({
+            "model": model_name,
+            "hash": knowledge_hash(texts, model_name),
+            "texts": list(texts)
+        }, indent=2),
+        encoding="utf-8"
+    )
@@ -1,8 +1,111 @@
+import asyncio
+from functools import lru_cache
 from fastapi import APIRouter, HTTPException
-from .schemas import ChatRequest, ChatResponse, HealthCheckResponse, ErrorResponse
+from fastapi.responses import ORJSONResponse
+from .schemas import ChatRequest, ChatResponse, HealthCheckResponse, ErrorResponse, refresh_timestamp
 from .service import chatbot_service
+from backend.utils.helpers import json_bytes, json_bytes_response
 
-router = APIRouter(prefix="/chatbot", tags=["Chatbot"])
+router = APIRouter(prefix="/chatbot", tags=["Chatbot"], default_response_class=ORJSONResponse)
+
+# Static payloads, serialized once at import
+CHATBOT_INFO = {
+    "service_name": "FitAI Coach",
+    "description": "AI-powered fitness and nutrition chatbot",
+    "model": "Llama 3.1 8B (via Groq)",
+    "capabilities": [
+        "Workout programming",
+        "Exercise technique guidance",
+        "Nutrition advice",
+        "Meal planning tips",
+        "Weight management strategies",
+        "Muscle building guidance",
+        "Cardiovascular fitness",
+        "Recovery recommendations",
+        "Motivation and support"
+    ],
+    "features": [
+        "Retrieval-Augmented Generation (RAG)",
+        "Fitness knowledge base",
+        "Context-aware responses",
+        "Motivational coaching style"
+    ],
+    "limitations": [
+        "Not a replacement for medical advice",
+        "Cannot diagnose medical conditions",
+        "Recommends consulting professionals for serious concerns"
+    ],
+    "knowledge_base_topics": 15
+}
+
+EXAMPLE_QUERIES = {
+    "beginner_questions": [
+        "How do I start working out as a complete beginner?",
+        "What exercises can I do at home without equipment?",
+        "How many days per week should I exercise?"
+    ],
+    "nutrition_questions": [
+        "What should I eat before a workout?",
+        "How much protein do I need daily?",
+        "Can you suggest healthy meal ideas for weight loss?"
+    ],
+    "advanced_questions": [
+        "How do I break through a strength plateau?",
+        "What's the best way to structure a push-pull-legs routine?",
+        "How should I adjust my diet during a cutting phase?"
+    ],
+    "motivation_questions": [
+        "How do I stay consistent with my workouts?",
+        "I'm feeling demotivated, any tips?",
+        "How do I build healthy fitness habits?"
+    ],
+    "recovery_questions": [
+        "How important are rest days?",
+        "What should I do for muscle soreness?",
+        "How much sleep do I need for optimal recovery?"
+    ]
+}
+
+_INFO_BYTES = json_bytes(CHATBOT_INFO)
+_EXAMPLES_BYTES = json_bytes(EXAMPLE_QUERIES)
+
+@lru_cache(maxsize=None)
+def _health_bytes(service_ready: bool, groq_api_configured: bool, embedder_loaded: bool) -> bytes:
+    """Serialized health body, built once per combination of component states"""
+    return json_bytes(HealthCheckResponse(
+        status="healthy" if service_ready else "unhealthy",
+        service="chatbot",
+        message="Chatbot service is ready" if service_ready else "Chatbot service has configuration issues",
+        groq_api_configured=groq_api_configured,
+        embedder_loaded=embedder_loaded
+    ).model_dump())
+
+_timestamp_task = None
+
+async def _refresh_timestamp_loop():
+    """Refresh the cached ChatResponse timestamp once per second"""
+    while True:
+        refresh_timestamp()
+        await asyncio.sleep(1.0)
+
+async def start_chatbot():
+    """Start the timestamp refresher and embedding batcher and load the embedder, run by the app lifespan"""
+    global _timestamp_task
+    _timestamp_task = asyncio.create_task(_refresh_timestamp_loop())
+    chatbot_service.start_batch_worker()
+    
+    # A no-op when PRELOAD_EMBEDDER already loaded it in the master
+    await chatbot_service.warm_up()
+
+async def stop_chatbot():
+    """Stop the background tasks and close the Groq HTTP client, run by the app lifespan"""
+    global _timestamp_task
+    if _timestamp_task is not None:
+        _timestamp_task.cancel()
+        _timestamp_task = None
+    
+    await chatbot_service.stop_batch_worker()
+    await chatbot_service.close()
 
 @router.post("/chat",
             response_model=ChatResponse,
@@ -74,18 +177,13 @@ async def health_check() -> HealthCheckResponse:
     Verifies that Groq API is configured and embedding model is loaded.
     """
     try:
-        health_status = chatbot_service.check_service_health()
-        
-        status = "healthy" if health_status["service_ready"] else "unhealthy"
-        message = "Chatbot service is ready" if health_status["service_ready"] else "Chatbot service has configuration issues"
+        health_status = await asyncio.to_thread(chatbot_service.check_service_health)
         
-        return HealthCheckResponse(
-            status=status,
-            service="chatbot",
-            message=message,
-            groq_api_configured=health_status["groq_api_configured"],
-            embedder_loaded=health_status["embedder_loaded"]
-        )
+        return json_bytes_response(_health_bytes(
+            health_status["service_ready"],
+            health_status["groq_api_configured"],
+            health_status["embedder_loaded"]
+        ))
     
     except Exception as e:
         return HealthCheckResponse(
@@ -101,64 +199,11 @@ async def get_chatbot_info():
     """
     Get information about the chatbot service capabilities.
     """
-    return {
-        "service_name": "FitAI Coach",
-        "description": "AI-powered fitness and nutrition chatbot",
-        "model": "Llama 3.1 8B (via Groq)",
-        "capabilities": [
-            "Workout programming",
-            "Exercise technique guidance",
-            "Nutrition advice",
-            "Meal planning tips",
-            "Weight management strategies",
-            "Muscle building guidance",
-            "Cardiovascular fitness",
-            "Recovery recommendations",
-            "Motivation and support"
-        ],
-        "features": [
-            "Retrieval-Augmented Generation (RAG)",
-            "Fitness knowledge base",
-            "Context-aware responses",
-            "Motivational coaching style"
-        ],
-        "limitations": [
-            "Not a replacement for medical advice",
-            "Cannot diagnose medical conditions",
-            "Recommends consulting professionals for serious concerns"
-        ],
-        "knowledge_base_topics": 15
-    }
+    return json_bytes_response(_INFO_BYTES)
 
 @router.get("/examples")
 async def get_example_queries():
     """
     Get example queries to help users understand chatbot capabilities.
     """
-    return {
-        "beginner_questions": [
-            "How do I start working out as a complete beginner?",
-            "What exercises can I do at home without equipment?",
-            "How many days per week should I exercise?"
-        ],
-        "nutrition_questions": [
-            "What should I eat before a workout?",
-            "How much protein do I need daily?",
-            "Can you suggest healthy meal ideas for weight loss?"
-        ],
-        "advanced_questions": [
-            "How do I break through a strength plateau?",
-            "What's the best way to structure a push-pull-legs routine?",
-            "How should I adjust my diet during a cutting phase?"
-        ],
-        "motivation_questions": [
-            "How do I stay consistent with my workouts?",
-            "I'm feeling demotivated, any tips?",
-            "How do I build healthy fitness habits?"
-        ],
-        "recovery_questions": [
-            "How important are rest days?",
-            "What should I do for muscle soreness?",
-            "How much sleep do I need for optimal recovery?"
-        ]
-    }
+    return json_bytes_response(_EXAMPLES_BYTES)
@@ -1,7 +1,26 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
+import time
 from datetime import datetime
 
+# Response timestamp at one-second resolution, refreshed every second by a background task in
+# routes; it is trusted until _NOW_EXPIRES, so without the task responses use the current time
+TIMESTAMP_MAX_AGE = 2.0
+_NOW_ISO: str = datetime.now().isoformat(timespec="seconds")
+_NOW_EXPIRES: float = 0.0
+
+def refresh_timestamp():
+    """Update the cached response timestamp"""
+    global _NOW_ISO, _NOW_EXPIRES
+    _NOW_ISO = datetime.now().isoformat(timespec="seconds")
+    _NOW_EXPIRES = time.monotonic() + TIMESTAMP_MAX_AGE
+
+def response_timestamp() -> str:
+    """The cached timestamp while the refresh task keeps it current, otherwise the current time"""
+    if time.monotonic() < _NOW_EXPIRES:
+        return _NOW_ISO
+    return datetime.now().isoformat(timespec="seconds")
+
 class ChatRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=500, description="User's fitness-related question")
     user_id: Optional[str] = Field(None, description="Optional user ID for conversation tracking")
@@ -10,7 +29,7 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     success: bool = Field(default=True, description="Request success status")
     response: str = Field(..., description="Chatbot's response")
-    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat(), description="Response timestamp")
+    timestamp: str = Field(default_factory=response_timestamp, description="Response timestamp")
     conversation_id: Optional[str] = Field(None, description="Conversation ID for tracking")
 
 class HealthCheckResponse(BaseModel):
@@ -1,16 +1,79 @@
 
 import os
-from groq import Groq
-from sentence_transformers import SentenceTransformer
-import faiss
+import re
+import asyncio
+import contextlib
+import threading
+from collections import OrderedDict
+import httpx
+from groq import AsyncGroq
 from pathlib import Path
 import numpy as np
-from dotenv import load_dotenv
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from .knowledge_base import KNOWLEDGE_TEXTS, load_embedder, load_kb_embeddings
 
-# Load .env from project root
+# Load .env from project root, when there is one
 env_path = Path(__file__).resolve().parent.parent.parent / ".env"
-load_dotenv(dotenv_path=env_path)
+if env_path.is_file():
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=env_path)
+
+# Number of encoded queries kept in memory
+QUERY_CACHE_SIZE = 1024
+
+# Binary index candidates per requested result, re-ranked with full-precision vectors
+RERANK_FACTOR = 4
+
+# Semantic response cache: reuse a Groq answer for near-identical questions
+RESPONSE_CACHE_SIMILARITY = 0.95
+RESPONSE_CACHE_SIZE = 10_000
+
+# Dynamic batching of concurrent query encodings
+MAX_BATCH = 32
+MAX_WAIT_MS = 8
+
+# Groq chat model settings
+GROQ_MODEL = "llama-3.1-8b-instant"
+GROQ_MAX_CONNECTIONS = 100
+
+# System prompt
+SYSTEM_PROMPT = """You are a supportive AI fitness coach named FitAI. 
+        
+Your role:
+- Provide practical, motivational fitness and nutrition advice
+- Be encouraging and supportive
+- Give specific, actionable recommendations
+- Keep responses concise (2-4 sentences typically)
+- If a question is outside fitness/health, politely redirect to fitness topics
+- If uncertain about medical advice, recommend consulting a healthcare professional
+
+Your expertise includes:
+- Workout programming and exercise form
+- Nutrition and meal planning
+- Weight management (loss/gain)
+- Muscle building and strength training
+- Cardiovascular fitness
+- Recovery and injury prevention
+- Motivation and habit formation
+
+Always be positive, clear, and helpful!"""
+
+# Static system message shared by every Groq request
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+# User message templates, with and without retrieved context
+_MSG_TMPL = "User question: {q}\n\nRelevant fitness knowledge:\n{ctx}"
+_MSG_TMPL_NOCTX = "User question: {q}"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_query(query: str) -> str:
+    """Normalize case and whitespace so repeated questions share a cache entry"""
+    return _WHITESPACE_RE.sub(" ", query.strip().lower())
+
+def binarize(vectors: np.ndarray) -> np.ndarray:
+    """Pack the sign bit of each embedding dimension into a uint8 bitvector"""
+    return np.packbits(vectors > 0, axis=1)
 
 class ChatbotService:
     def __init__(self):
@@ -19,62 +82,269 @@ class ChatbotService:
         if not api_key:
             raise ValueError("GROQ_API_KEY not found in environment variables")
         
-        self.client = Groq(api_key=api_key)
+        # One shared HTTP/2 connection pool for all Groq requests
+        self.http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=GROQ_MAX_CONNECTIONS)
+        )
+        self.client = AsyncGroq(api_key=api_key, http_client=self.http_client)
+        
+        # Embedding model for RAG, loaded on the first chat request
+        self.bf16_enabled = False
+        self.embedder = None
+        self.embedding_model_name = None
+        self.embedder_loaded = False
+        self._embedder_load_failed = False
+        self._load_lock = asyncio.Lock()
+        
+        # Cache query embeddings, repeated questions skip the transformer pass
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        
+        # Prior query vectors and their Groq responses, a ring of RESPONSE_CACHE_SIZE slots
+        # aligned by position; once full, each new response overwrites the oldest one
+        self.response_vectors: Optional[np.ndarray] = None
+        self.response_texts: List[Optional[str]] = [None] * RESPONSE_CACHE_SIZE
+        self._response_count = 0
+        self._response_lock = threading.Lock()
         
-        # Load embedding model for RAG
+        # Batch worker state, started with the FastAPI app
+        self._encode_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        
+        # Fitness knowledge base
+        self.knowledge_texts = KNOWLEDGE_TEXTS
+        self.knowledge_embeddings = None
+        self.index = None
+        
+        # Under a preforking server, load once in the master so forked workers share the
+        # weights copy-on-write
+        if os.getenv("PRELOAD_EMBEDDER", "False").lower() == "true":
+            self._load_embedder(preload=True)
+    
+    def _load_embedder(self, preload: bool = False):
+        """Load the embedding model and build the FAISS index for RAG"""
         try:
-            self.embedder = SentenceTransformer("all-MiniLM-L6-v2")
-            self.embedder_loaded = True
+            self.embedder, self.embedding_model_name = load_embedder()
+            self._optimize_embedder()
         except Exception as e:
             print(f"Warning: Could not load embedding model: {e}")
             self.embedder = None
-            self.embedder_loaded = False
+            self.embedding_model_name = None
+            self._embedder_load_failed = True
+            return
+        
+        # Encoding the knowledge base in a preforking master would start torch's thread pool,
+        # which forked workers can hang on; without a current kb.npy they load the model themselves
+        if not self._create_knowledge_index(allow_encode=not preload):
+            print("Warning: Not preloading the embedding model, the precomputed knowledge base "
+                  "embeddings are missing or stale; run scripts/build_kb.py to rebuild them")
+            self.embedder = None
+            self.embedding_model_name = None
+            return
+        
+        self.embedder_loaded = True
+    
+    async def warm_up(self):
+        """Load the embedding model now instead of on the first chat request"""
+        await self._ensure_embedder()
+    
+    async def _ensure_embedder(self):
+        """Load the embedding model once, concurrent first requests wait on the same load"""
+        if self.embedder_loaded or self._embedder_load_failed:
+            return
+        
+        async with self._load_lock:
+            if self.embedder_loaded or self._embedder_load_failed:
+                return
+            await asyncio.to_thread(self._load_embedder)
+    
+    def _optimize_embedder(self):
+        """Run the embedding model in BF16 via Intel Extension for PyTorch when it is installed"""
+        # Static model2vec embeddings are a table lookup, there is no transformer to optimize
+        if not hasattr(self.embedder, "_first_module"):
+            return
         
-        # Fitness knowledge base
-        self.knowledge_texts = [
-            "Drink at least 8 glasses of water daily for hydration.",
-            "For fat loss, a calorie deficit of 300-500 kcal/day is ideal.",
-            "Aim for 150 minutes of moderate exercise weekly.",
-            "Protein intake should be around 1.6-2.2 g/kg of body weight for muscle gain.",
-            "Squats strengthen legs, core, and improve overall stability.",
-            "Rest days are crucial for muscle recovery and growth.",
-            "Cardio exercises like running, cycling help improve cardiovascular health.",
-            "Strength training increases metabolism and bone density.",
-            "A balanced diet includes proteins, carbs, healthy fats, and micronutrients.",
-            "Sleep 7-9 hours per night for optimal recovery and performance.",
-            "Warm-up before exercise prevents injuries and improves performance.",
-            "Progressive overload is key to building muscle and strength.",
-            "HIIT workouts are effective for burning fat in less time.",
-            "Consistency is more important than intensity for long-term results.",
-            "Track your progress with measurements, not just scale weight."
-        ]
-        
-        # Create FAISS index for RAG
-        if self.embedder_loaded:
-            self._create_knowledge_index()
-    
-    def _create_knowledge_index(self):
-        """Create FAISS index from knowledge base"""
         try:
-            knowledge_embeddings = self.embedder.encode(
-                self.knowledge_texts, 
-                convert_to_numpy=True
-            )
-            self.index = faiss.IndexFlatL2(knowledge_embeddings.shape[1])
-            self.index.add(knowledge_embeddings)
+            import torch
+            import intel_extension_for_pytorch as ipex
+        except ImportError:
+            return
+        
+        try:
+            transformer = self.embedder._first_module()
+            transformer.auto_model = ipex.optimize(transformer.auto_model.eval(), dtype=torch.bfloat16)
+            self.bf16_enabled = True
+        except Exception as e:
+            print(f"Warning: Could not enable BF16 embeddings, using FP32: {e}")
+    
+    def _inference_context(self):
+        """Context for embedding calls: BF16 autocast when enabled, no-op otherwise"""
+        if not self.bf16_enabled:
+            return contextlib.nullcontext()
+        
+        import torch
+        stack = contextlib.ExitStack()
+        stack.enter_context(torch.inference_mode())
+        stack.enter_context(torch.cpu.amp.autocast(dtype=torch.bfloat16))
+        return stack
+    
+    def _create_knowledge_index(self, allow_encode: bool = True) -> bool:
+        """Create FAISS index from knowledge base, False if it had to be encoded but allow_encode is off"""
+        try:
+            # Imported with the embedder rather than at startup, like the embedding libraries
+            import faiss
+            
+            # Prefer embeddings precomputed by scripts/build_kb.py
+            knowledge_embeddings = load_kb_embeddings(self.embedding_model_name, self.knowledge_texts)
+            if knowledge_embeddings is None:
+                if not allow_encode:
+                    return False
+                print("Warning: Precomputed knowledge base embeddings are missing or stale, "
+                      "run scripts/build_kb.py to rebuild them")
+                with self._inference_context():
+                    knowledge_embeddings = self.embedder.encode(self.knowledge_texts)
+            # Normalized vectors + inner product = cosine similarity
+            knowledge_embeddings = np.ascontiguousarray(knowledge_embeddings, dtype="float32")
+            faiss.normalize_L2(knowledge_embeddings)
+            
+            # Full-precision vectors are kept to re-rank the binary search candidates
+            self.knowledge_embeddings = knowledge_embeddings
+            
+            # Binary-quantized codes searched by Hamming distance (popcount)
+            knowledge_codes = binarize(knowledge_embeddings)
+            self.index = faiss.IndexBinaryFlat(knowledge_codes.shape[1] * 8)
+            self.index.add(knowledge_codes)
         except Exception as e:
             print(f"Warning: Could not create FAISS index: {e}")
             self.index = None
+        return True
+    
+    def _encode_batch(self, queries: List[str]) -> np.ndarray:
+        """Encode normalized queries into unit-length embeddings"""
+        with self._inference_context():
+            query_vectors = self.embedder.encode(queries)
+        query_vectors = np.ascontiguousarray(query_vectors, dtype="float32")
+        import faiss
+        faiss.normalize_L2(query_vectors)
+        return query_vectors
+    
+    def start_batch_worker(self):
+        """Start the background task that batches concurrent query encodings"""
+        if self._batch_task is None:
+            self._encode_queue = asyncio.Queue()
+            self._batch_task = asyncio.create_task(self._batch_encode_worker())
+    
+    async def stop_batch_worker(self):
+        """Stop the batch worker, pending queries fall back to direct encoding"""
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            try:
+                await self._batch_task
+            except asyncio.CancelledError:
+                pass
+            self._batch_task = None
+            self._encode_queue = None
+    
+    async def _batch_encode_worker(self):
+        """Collect queries for up to MAX_WAIT_MS (or MAX_BATCH items) and encode them in one call"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._encode_queue.get()]
+            deadline = loop.time() + MAX_WAIT_MS / 1000
+            
+            while len(batch) < MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._encode_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                query_vectors = await asyncio.to_thread(self._encode_batch, [query for query, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for row, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(query_vectors[row:row + 1])
     
-    def _retrieve_context(self, query: str, k: int = 2) -> str:
+    async def _encode_query(self, query: str) -> np.ndarray:
+        """Return the (1, d) embedding for a query, using the cache and batch worker"""
+        key = normalize_query(query)
+        query_vector = self._query_cache.get(key)
+        if query_vector is not None:
+            self._query_cache.move_to_end(key)
+            return query_vector
+        
+        if self._encode_queue is not None:
+            future = asyncio.get_running_loop().create_future()
+            await self._encode_queue.put((key, future))
+            query_vector = await future
+        else:
+            query_vector = await asyncio.to_thread(self._encode_batch, [key])
+        
+        self._query_cache[key] = query_vector
+        if len(self._query_cache) > QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+        return query_vector
+    
+    async def _embed_user_query(self, query: str) -> Optional[np.ndarray]:
+        """Embed the user query for retrieval and caching, None if embeddings are unavailable"""
+        await self._ensure_embedder()
+        if not self.embedder_loaded:
+            return None
+        
+        try:
+            return await self._encode_query(query)
+        except Exception as e:
+            print(f"Warning: Query embedding failed: {e}")
+            return None
+    
+    def _lookup_cached_response(self, query_vector: np.ndarray) -> Optional[str]:
+        """Return a cached response for a semantically equivalent prior query"""
+        with self._response_lock:
+            filled = min(self._response_count, RESPONSE_CACHE_SIZE)
+            if filled == 0:
+                return None
+            
+            # Unit-length vectors, so the inner product is the cosine similarity
+            scores = self.response_vectors[:filled] @ query_vector[0]
+            best = int(np.argmax(scores))
+            if scores[best] > RESPONSE_CACHE_SIMILARITY:
+                return self.response_texts[best]
+        return None
+    
+    def _cache_response(self, query_vector: np.ndarray, response: str):
+        """Remember a fresh Groq response, overwriting the oldest entry when full"""
+        with self._response_lock:
+            if self.response_vectors is None:
+                self.response_vectors = np.zeros((RESPONSE_CACHE_SIZE, query_vector.shape[1]), dtype="float32")
+            
+            slot = self._response_count % RESPONSE_CACHE_SIZE
+            self.response_vectors[slot] = query_vector[0]
+            self.response_texts[slot] = response
+            self._response_count += 1
+    
+    def _retrieve_context(self, query_vector: np.ndarray, k: int = 2) -> str:
         """Retrieve relevant context using RAG"""
-        if not self.embedder_loaded or self.index is None:
+        if self.index is None:
             return ""
         
         try:
-            query_vector = self.embedder.encode([query], convert_to_numpy=True)
-            D, I = self.index.search(query_vector, k=k)
-            retrieved_context = "\n".join([self.knowledge_texts[i] for i in I[0]])
+            # Hamming search for candidates, then exact cosine re-ranking
+            candidates = min(k * RERANK_FACTOR, self.index.ntotal)
+            D, I = self.index.search(binarize(query_vector), candidates)
+            candidate_ids = I[0][I[0] >= 0]
+            scores = self.knowledge_embeddings[candidate_ids] @ query_vector[0]
+            top_ids = candidate_ids[np.argsort(-scores)[:k]]
+            
+            retrieved_context = "\n".join([self.knowledge_texts[i] for i in top_ids])
             return retrieved_context
         except Exception as e:
             print(f"Warning: Context retrieval failed: {e}")
@@ -83,59 +353,55 @@ class ChatbotService:
     async def get_chat_response(self, user_query: str) -> str:
         """Generate chatbot response using Groq API with RAG"""
         
-        # Retrieve relevant context
-        retrieved_context = self._retrieve_context(user_query)
+        query_vector = await self._embed_user_query(user_query)
         
-        # System prompt
-        system_prompt = """You are a supportive AI fitness coach named FitAI. 
+        # Serve semantically equivalent repeats from the response cache
+        if query_vector is not None:
+            cached_response = await asyncio.to_thread(self._lookup_cached_response, query_vector)
+            if cached_response is not None:
+                return cached_response
+        
+        # Retrieve relevant context
+        retrieved_context = self._retrieve_context(query_vector) if query_vector is not None else ""
         
-Your role:
-- Provide practical, motivational fitness and nutrition advice
-- Be encouraging and supportive
-- Give specific, actionable recommendations
-- Keep responses concise (2-4 sentences typically)
-- If a question is outside fitness/health, politely redirect to fitness topics
-- If uncertain about medical advice, recommend consulting a healthcare professional
-
-Your expertise includes:
-- Workout programming and exercise form
-- Nutrition and meal planning
-- Weight management (loss/gain)
-- Muscle building and strength training
-- Cardiovascular fitness
-- Recovery and injury prevention
-- Motivation and habit formation
-
-Always be positive, clear, and helpful!"""
-
         # Construct user message with context
-        user_message = f"User question: {user_query}"
         if retrieved_context:
-            user_message += f"\n\nRelevant fitness knowledge:\n{retrieved_context}"
+            user_message = _MSG_TMPL.format(q=user_query, ctx=retrieved_context)
+        else:
+            user_message = _MSG_TMPL_NOCTX.format(q=user_query)
         
         try:
             # Call Groq API
-            completion = self.client.chat.completions.create(
-                model="llama-3.1-8b-instant",
+            completion = await self.client.chat.completions.create(
+                model=GROQ_MODEL,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    _SYSTEM_MESSAGE,
                     {"role": "user", "content": user_message}
                 ],
                 temperature=0.7,
                 max_tokens=300
             )
-            
-            return completion.choices[0].message.content.strip()
+            response_text = completion.choices[0].message.content.strip()
         
         except Exception as e:
             return f"I'm having trouble processing your request right now. Error: {str(e)}"
+        
+        if query_vector is not None:
+            await asyncio.to_thread(self._cache_response, query_vector, response_text)
+        
+        return response_text
+    
+    async def close(self):
+        """Close the shared Groq HTTP client"""
+        await self.http_client.aclose()
     
     def check_service_health(self) -> Dict[str, Any]:
         """Check chatbot service health"""
         groq_configured = bool(os.getenv("GROQ_API_KEY"))
         
+        # The embedder loads lazily, so only a failed load makes the service unready
         return {
-            "service_ready": groq_configured and self.embedder_loaded,
+            "service_ready": groq_configured and not self._embedder_load_failed,
             "groq_api_configured": groq_configured,
             "embedder_loaded": self.embedder_loaded
         }
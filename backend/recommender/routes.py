@@ -1,53 +1,34 @@
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Literal, Optional, Dict, Any
 from .service import recommender_service
+from backend.utils.helpers import json_bytes, json_bytes_response
 
 # Create router instance
-router = APIRouter(prefix="/recommender", tags=["Recommender"])
+router = APIRouter(prefix="/recommender", tags=["Recommender"], default_response_class=ORJSONResponse)
 
 # Pydantic models for request validation
 class UserInputModel(BaseModel):
     age: int = Field(..., ge=13, le=100, description="User's age in years")
-    gender: str = Field(..., description="User's gender")
+    gender: Literal["male", "female"] = Field(..., description="User's gender")
     weight: float = Field(..., gt=0, le=500, description="User's weight in kg")
     height: float = Field(..., gt=0, le=300, description="User's height in cm")
-    goal: str = Field(..., description="Fitness goal")
-    activity_level: str = Field(..., description="Activity level")
-    diet_preference: str = Field(..., description="Dietary preference")
-    allergies: Optional[List[str]] = Field(default=[], description="List of allergies")
+    goal: Literal["weight_loss", "muscle_gain", "maintenance"] = Field(..., description="Fitness goal")
+    activity_level: Literal["sedentary", "light", "moderate", "active"] = Field(..., description="Activity level")
+    diet_preference: Literal["veg", "non_veg", "vegan", "none"] = Field(..., description="Dietary preference")
+    allergies: Optional[List[str]] = Field(default_factory=list, description="List of allergies")
     
     # Validators
-    @validator('gender')
-    def validate_gender(cls, v):
-        allowed_genders = ['male', 'female']
-        if v.lower() not in allowed_genders:
-            raise ValueError(f'Gender must be one of: {", ".join(allowed_genders)}')
-        return v.lower()
+    @field_validator('gender', 'goal', 'activity_level', 'diet_preference', mode='before')
+    @classmethod
+    def lowercase_choice(cls, v):
+        # Accept choices case-insensitively, the Literal check runs in pydantic-core
+        return v.lower() if isinstance(v, str) else v
     
-    @validator('goal')
-    def validate_goal(cls, v):
-        allowed_goals = ['weight_loss', 'muscle_gain', 'maintenance']
-        if v.lower() not in allowed_goals:
-            raise ValueError(f'Goal must be one of: {", ".join(allowed_goals)}')
-        return v.lower()
-    
-    @validator('activity_level')
-    def validate_activity_level(cls, v):
-        allowed_levels = ['sedentary', 'light', 'moderate', 'active']
-        if v.lower() not in allowed_levels:
-            raise ValueError(f'Activity level must be one of: {", ".join(allowed_levels)}')
-        return v.lower()
-    
-    @validator('diet_preference')
-    def validate_diet_preference(cls, v):
-        allowed_diets = ['veg', 'non_veg', 'vegan', 'none']
-        if v.lower() not in allowed_diets:
-            raise ValueError(f'Diet preference must be one of: {", ".join(allowed_diets)}')
-        return v.lower()
-    
-    @validator('allergies')
+    @field_validator('allergies')
+    @classmethod
     def validate_allergies(cls, v):
         if v is None:
             return []
@@ -62,10 +43,39 @@ class RecommendationResponse(BaseModel):
     tdee: Optional[float] = Field(None, description="Total Daily Energy Expenditure")
     message: str = Field(default="Recommendations generated successfully")
 
+class BatchRecommendationResponse(BaseModel):
+    recommendations: List[RecommendationResponse] = Field(..., description="Recommendations, in request order")
+    count: int = Field(..., description="Number of users processed")
+    message: str = Field(default="Batch recommendations generated successfully")
+
 class ErrorResponse(BaseModel):
     error: str
     detail: Optional[str] = None
 
+# Maximum number of users accepted by the batch endpoint
+MAX_BATCH_SIZE = 1024
+
+# Static payloads, serialized once at import
+SERVICE_INFO = {
+    "supported_genders": ["male", "female"],
+    "supported_goals": ["weight_loss", "muscle_gain", "maintenance"],
+    "supported_activity_levels": ["sedentary", "light", "moderate", "active"],
+    "supported_diet_preferences": ["veg", "non_veg", "vegan", "none"],
+    "common_allergies": ["nuts", "dairy", "gluten", "eggs", "soy", "fish", "shellfish"],
+    "calorie_adjustments": {
+        "weight_loss": "-500 kcal from TDEE",
+        "muscle_gain": "+500 kcal from TDEE",
+        "maintenance": "No adjustment from TDEE"
+    }
+}
+
+_HEALTH_BYTES = json_bytes({
+    "status": "healthy",
+    "service": "recommender",
+    "message": "Recommender service is running"
+})
+_SERVICE_INFO_BYTES = json_bytes(SERVICE_INFO)
+
 @router.post("/recommendations", 
              response_model=RecommendationResponse,
              responses={
@@ -98,7 +108,7 @@ async def get_recommendations(user_input: UserInputModel) -> RecommendationRespo
     """
     try:
         # Convert Pydantic model to dict
-        user_data = user_input.dict()
+        user_data = user_input.model_dump()
         
         # Generate recommendations using the service
         recommendations = recommender_service.generate_recommendations(user_data)
@@ -136,31 +146,75 @@ async def get_recommendations(user_input: UserInputModel) -> RecommendationRespo
             detail=f"An error occurred while generating recommendations: {str(e)}"
         )
 
+@router.post("/recommendations/batch",
+             response_model=BatchRecommendationResponse,
+             responses={
+                 400: {"model": ErrorResponse, "description": "Bad Request"},
+                 413: {"model": ErrorResponse, "description": "Batch Too Large"},
+                 422: {"model": ErrorResponse, "description": "Validation Error"},
+                 500: {"model": ErrorResponse, "description": "Internal Server Error"}
+             })
+async def get_batch_recommendations(users: List[UserInputModel]) -> BatchRecommendationResponse:
+    """
+    Generate recommendations for a group of users in one request (e.g. cohort planning).
+    
+    Each item takes the same fields as `POST /recommender/recommendations`.
+    Calorie targets are computed for the whole batch at once.
+    
+    **Limits:**
+    - 1 to 1024 users per request
+    
+    **Returns:**
+    - One recommendation per user, in request order
+    """
+    if not users:
+        raise HTTPException(status_code=400, detail="At least one user is required")
+    if len(users) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large. Maximum batch size: {MAX_BATCH_SIZE} users"
+        )
+    
+    try:
+        results = recommender_service.generate_recommendations_batch([user.model_dump() for user in users])
+        
+        for index, recommendations in enumerate(results):
+            if not recommendations.get("workouts"):
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Unable to generate workout recommendations for user {index}"
+                )
+            if not recommendations.get("meals"):
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Unable to generate meal recommendations for user {index}. Try adjusting their dietary preferences or allergies."
+                )
+        
+        return BatchRecommendationResponse(
+            recommendations=[RecommendationResponse(**recommendations) for recommendations in results],
+            count=len(results)
+        )
+    
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"An error occurred while generating batch recommendations: {str(e)}"
+        )
+
 @router.get("/health")
 async def health_check():
     """
     Health check endpoint for the recommender service.
     """
-    return {
-        "status": "healthy",
-        "service": "recommender",
-        "message": "Recommender service is running"
-    }
+    return json_bytes_response(_HEALTH_BYTES)
 
 @router.get("/info")
 async def get_service_info():
     """
     Get information about available options for the recommender service.
     """
-    return {
-        "supported_genders": ["male", "female"],
-        "supported_goals": ["weight_loss", "muscle_gain", "maintenance"],
-        "supported_activity_levels": ["sedentary", "light", "moderate", "active"],
-        "supported_diet_preferences": ["veg", "non_veg", "vegan", "none"],
-        "common_allergies": ["nuts", "dairy", "gluten", "eggs", "soy", "fish", "shellfish"],
-        "calorie_adjustments": {
-            "weight_loss": "-500 kcal from TDEE",
-            "muscle_gain": "+500 kcal from TDEE",
-            "maintenance": "No adjustment from TDEE"
-        }
-    }
\ No newline at end of file
+    return json_bytes_response(_SERVICE_INFO_BYTES)
\ No newline at end of file
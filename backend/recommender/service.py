@@ -1,6 +1,58 @@
 
-from typing import List, Dict, Any
-import random
+from typing import List, Dict, Any, FrozenSet, Tuple
+from itertools import chain, combinations
+import ahocorasick
+import numpy as np
+from backend.utils.helpers import njit
+
+# Integer codes for the compiled calorie calculation
+GENDER_CODES = {"male": 0, "female": 1}
+ACTIVITY_CODES = {"sedentary": 0, "light": 1, "moderate": 2, "active": 3}
+GOAL_CODES = {"weight_loss": 0, "muscle_gain": 1, "maintenance": 2}
+
+# Lookup tables indexed by the codes above
+ACTIVITY_MULTIPLIERS = np.array([
+    1.2,    # sedentary: little to no exercise
+    1.375,  # light: exercise 1-3 days/week
+    1.55,   # moderate: exercise 3-5 days/week
+    1.725   # active: heavy exercise 6-7 days/week
+])
+GOAL_ADJUSTMENTS = np.array([-500.0, 500.0, 0.0])
+
+# Harris-Benedict (revised) BMR = c0 + c1 * weight + c2 * height - c3 * age, by gender code
+BMR_COEFFICIENTS = np.array([
+    [88.362, 13.397, 4.799, 5.677],   # male
+    [447.593, 9.247, 3.098, 4.330]    # female
+])
+
+@njit(cache=True)
+def compute_calorie_target(age: int, gender_code: int, weight: float, height: float,
+                           activity_code: int, goal_code: int) -> Tuple[float, float, int]:
+    """
+    Fused BMR (Harris-Benedict, revised), TDEE and goal adjustment.
+    Returns (bmr, tdee, calorie_target).
+    """
+    c = BMR_COEFFICIENTS[gender_code]
+    bmr = c[0] + (c[1] * weight) + (c[2] * height) - (c[3] * age)
+    
+    tdee = bmr * ACTIVITY_MULTIPLIERS[activity_code]
+    return bmr, tdee, int(tdee + GOAL_ADJUSTMENTS[goal_code])
+
+# Compile at import so the first request doesn't pay the JIT cost
+compute_calorie_target(30, 0, 70.0, 170.0, 0, 2)
+
+def compute_calorie_targets(ages: np.ndarray, gender_codes: np.ndarray, weights: np.ndarray, heights: np.ndarray,
+                            activity_codes: np.ndarray, goal_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized compute_calorie_target over arrays of users.
+    Returns (bmr, tdee, calorie_target) arrays.
+    """
+    c = BMR_COEFFICIENTS[gender_codes].T
+    bmr = c[0] + (c[1] * weights) + (c[2] * heights) - (c[3] * ages)
+    tdee = bmr * ACTIVITY_MULTIPLIERS[activity_codes]
+    # astype truncates toward zero, matching int() in the scalar version
+    calorie_target = (tdee + GOAL_ADJUSTMENTS[goal_codes]).astype(np.int64)
+    return bmr, tdee, calorie_target
 
 class RecommenderService:
     def __init__(self):
@@ -78,44 +130,40 @@ class RecommenderService:
                 "Greek Salad"
             ]
         }
-    
-    def calculate_bmr(self, age: int, gender: str, weight: float, height: float) -> float:
-        """
-        Calculate Basal Metabolic Rate using Harris-Benedict Equation (Revised)
-        """
-        if gender.lower() == "male":
-            bmr = 88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age)
-        else:  # female
-            bmr = 447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age)
         
-        return bmr
-    
-    def calculate_tdee(self, bmr: float, activity_level: str) -> float:
-        """
-        Calculate Total Daily Energy Expenditure based on activity level
-        """
-        activity_multipliers = {
-            "sedentary": 1.2,     # Little to no exercise
-            "light": 1.375,       # Light exercise 1-3 days/week
-            "moderate": 1.55,     # Moderate exercise 3-5 days/week
-            "active": 1.725       # Heavy exercise 6-7 days/week
+        # Simple allergen filtering (in a real app, you'd have more detailed ingredient data)
+        self.allergen_keywords = {
+            "nuts": ["almond", "peanut", "walnut", "cashew"],
+            "dairy": ["cheese", "yogurt", "milk"],
+            "gluten": ["bread", "pasta", "wheat"],
+            "eggs": ["egg", "omelet"],
+            "soy": ["tofu", "soy"],
+            "fish": ["salmon", "tuna", "fish"],
+            "shellfish": ["shrimp", "crab", "lobster"]
         }
+        self.allergen_automaton = self._build_allergen_automaton()
         
-        multiplier = activity_multipliers.get(activity_level.lower(), 1.2)
-        return bmr * multiplier
+        # Meal candidates per (diet, allergy set), so requests skip string scanning
+        self._meal_cache = self._build_meal_cache()
+        
+        # Persistent generator and preconverted arrays for random selection
+        self._rng = np.random.default_rng()
+        self._workout_arrays = {goal: np.array(workouts, dtype=object) for goal, workouts in self.workouts.items()}
     
-    def adjust_calories_for_goal(self, tdee: float, goal: str) -> int:
+    def _build_allergen_automaton(self) -> ahocorasick.Automaton:
         """
-        Adjust TDEE based on fitness goal
+        Build an Aho-Corasick automaton mapping each allergen keyword to its allergies
         """
-        goal_adjustments = {
-            "weight_loss": -500,
-            "muscle_gain": 500,
-            "maintenance": 0
-        }
+        keyword_allergies: Dict[str, set] = {}
+        for allergy, keywords in self.allergen_keywords.items():
+            for keyword in keywords:
+                keyword_allergies.setdefault(keyword, set()).add(allergy)
         
-        adjustment = goal_adjustments.get(goal.lower(), 0)
-        return int(tdee + adjustment)
+        automaton = ahocorasick.Automaton()
+        for keyword, allergies in keyword_allergies.items():
+            automaton.add_word(keyword, frozenset(allergies))
+        automaton.make_automaton()
+        return automaton
     
     def filter_meals_by_allergies(self, meals: List[str], allergies: List[str]) -> List[str]:
         """
@@ -124,34 +172,21 @@ class RecommenderService:
         if not allergies:
             return meals
         
-        # Simple allergen filtering (in a real app, you'd have more detailed ingredient data)
-        allergen_keywords = {
-            "nuts": ["almond", "peanut", "walnut", "cashew"],
-            "dairy": ["cheese", "yogurt", "milk"],
-            "gluten": ["bread", "pasta", "wheat"],
-            "eggs": ["egg", "omelet"],
-            "soy": ["tofu", "soy"],
-            "fish": ["salmon", "tuna", "fish"],
-            "shellfish": ["shrimp", "crab", "lobster"]
-        }
+        allergies_lower = {allergy.lower() for allergy in allergies}
+        # Allergies without a keyword mapping are matched directly against the meal name
+        unmapped_allergies = [allergy for allergy in allergies_lower if allergy not in self.allergen_keywords]
         
         filtered_meals = []
         for meal in meals:
             meal_lower = meal.lower()
-            contains_allergen = False
             
-            for allergy in allergies:
-                allergy_lower = allergy.lower()
-                # Check if allergy is in our keyword mapping
-                if allergy_lower in allergen_keywords:
-                    keywords = allergen_keywords[allergy_lower]
-                    if any(keyword in meal_lower for keyword in keywords):
-                        contains_allergen = True
-                        break
-                # Direct keyword match
-                elif allergy_lower in meal_lower:
-                    contains_allergen = True
-                    break
+            # Single automaton pass finds every allergen keyword in the meal
+            contains_allergen = any(
+                not allergens.isdisjoint(allergies_lower)
+                for _, allergens in self.allergen_automaton.iter(meal_lower)
+            )
+            if not contains_allergen:
+                contains_allergen = any(allergy in meal_lower for allergy in unmapped_allergies)
             
             if not contains_allergen:
                 filtered_meals.append(meal)
@@ -162,29 +197,57 @@ class RecommenderService:
         """
         Select appropriate workouts based on goal
         """
-        available_workouts = self.workouts.get(goal.lower(), self.workouts["maintenance"])
+        available_workouts = self._workout_arrays.get(goal.lower(), self._workout_arrays["maintenance"])
         
         # Return random selection of workouts (up to the requested count)
         selected_count = min(count, len(available_workouts))
-        return random.sample(available_workouts, selected_count)
+        return self._rng.choice(available_workouts, size=selected_count, replace=False).tolist()
     
-    def select_meals(self, diet_preference: str, allergies: List[str], count: int = 5) -> List[str]:
+    def _build_meal_cache(self) -> Dict[Tuple[str, FrozenSet[str]], np.ndarray]:
         """
-        Select appropriate meals based on diet preference and allergies
+        Precompute meal candidates for every diet and every subset of the known allergies
         """
-        available_meals = self.meals.get(diet_preference.lower(), self.meals["none"])
+        known_allergies = list(self.allergen_keywords)
+        allergy_sets = chain.from_iterable(
+            combinations(known_allergies, size) for size in range(len(known_allergies) + 1)
+        )
+        return {
+            (diet, frozenset(allergy_set)): np.array(self._filter_meal_candidates(diet, list(allergy_set)), dtype=object)
+            for allergy_set in allergy_sets
+            for diet in self.meals
+        }
+    
+    def _filter_meal_candidates(self, diet_preference: str, allergies: List[str]) -> List[str]:
+        """
+        Meals matching the diet preference with allergens removed
+        """
+        available_meals = self.meals.get(diet_preference, self.meals["none"])
         
         # Filter out meals with allergens
-        filtered_meals = self.filter_meals_by_allergies(available_meals, allergies or [])
+        filtered_meals = self.filter_meals_by_allergies(available_meals, allergies)
         
         if not filtered_meals:
             # Fallback to basic meals if all meals are filtered out
             filtered_meals = self.meals["none"]
-            filtered_meals = self.filter_meals_by_allergies(filtered_meals, allergies or [])
+            filtered_meals = self.filter_meals_by_allergies(filtered_meals, allergies)
+        
+        return filtered_meals
+    
+    def select_meals(self, diet_preference: str, allergies: List[str], count: int = 5) -> List[str]:
+        """
+        Select appropriate meals based on diet preference and allergies
+        """
+        diet = diet_preference.lower()
+        allergy_set = frozenset(allergy.lower() for allergy in allergies or [])
+        
+        # Known diet/allergy combinations are precomputed, anything else is filtered on demand
+        filtered_meals = self._meal_cache.get((diet, allergy_set))
+        if filtered_meals is None:
+            filtered_meals = np.array(self._filter_meal_candidates(diet, list(allergy_set)), dtype=object)
         
         # Return random selection of meals (up to the requested count)
         selected_count = min(count, len(filtered_meals))
-        return random.sample(filtered_meals, selected_count) if filtered_meals else []
+        return self._rng.choice(filtered_meals, size=selected_count, replace=False).tolist() if selected_count else []
     
     def generate_recommendations(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -201,9 +264,14 @@ class RecommenderService:
         allergies = user_data.get("allergies", [])
         
         # Calculate calorie target
-        bmr = self.calculate_bmr(age, gender, weight, height)
-        tdee = self.calculate_tdee(bmr, activity_level)
-        calorie_target = self.adjust_calories_for_goal(tdee, goal)
+        bmr, tdee, calorie_target = compute_calorie_target(
+            age,
+            GENDER_CODES.get(gender.lower(), 1),
+            float(weight),
+            float(height),
+            ACTIVITY_CODES.get(activity_level.lower(), 0),
+            GOAL_CODES.get(goal.lower(), 2)
+        )
         
         # Select workouts and meals
         workouts = self.select_workouts(goal)
@@ -217,6 +285,35 @@ class RecommenderService:
             "tdee": round(tdee, 1)
         }
 
+    
+    def generate_recommendations_batch(self, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generate recommendations for many users, computing calorie targets as array operations
+        """
+        if not users:
+            return []
+        
+        bmr, tdee, calorie_target = compute_calorie_targets(
+            np.array([user["age"] for user in users], dtype=np.float64),
+            np.array([GENDER_CODES.get(user["gender"].lower(), 1) for user in users]),
+            np.array([user["weight"] for user in users], dtype=np.float64),
+            np.array([user["height"] for user in users], dtype=np.float64),
+            np.array([ACTIVITY_CODES.get(user["activity_level"].lower(), 0) for user in users]),
+            np.array([GOAL_CODES.get(user["goal"].lower(), 2) for user in users])
+        )
+        
+        # Selection is random per user, so it stays a per-row loop
+        return [
+            {
+                "calorie_target": int(calorie_target[i]),
+                "workouts": self.select_workouts(user["goal"]),
+                "meals": self.select_meals(user["diet_preference"], user.get("allergies", [])),
+                "bmr": round(float(bmr[i]), 1),
+                "tdee": round(float(tdee[i]), 1)
+            }
+            for i, user in enumerate(users)
+        ]
+
 
 # Create a singleton instance
 recommender_service = RecommenderService()
\ No newline at end of file
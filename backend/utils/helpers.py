@@ -1 +1,55 @@
+"""
+Shared helpers for the backend modules.
+"""
 
+import gzip
+import hashlib
+from typing import Any, Optional
+
+import orjson
+from fastapi import Request, Response
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, compiled functions run as plain Python without it
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+def json_bytes(payload: Any) -> bytes:
+    """Serialize a static payload once, so handlers can skip per-request encoding"""
+    return orjson.dumps(payload)
+
+def json_bytes_response(body: bytes) -> Response:
+    """Wrap pre-serialized JSON bytes in a response"""
+    return Response(content=body, media_type="application/json")
+
+def json_etag(body: bytes) -> str:
+    """Strong ETag for a pre-serialized body"""
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+def gzip_bytes(body: bytes) -> bytes:
+    """Gzip a static body once, with a fixed mtime so the output is the same on every start"""
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+def cached_json_response(request: Request, body: bytes, etag: str, max_age: int,
+                         gzip_body: Optional[bytes] = None) -> Response:
+    """
+    Pre-serialized JSON with caching headers, or 304 Not Modified when the client's copy is current.
+    With gzip_body, clients accepting gzip get the pre-compressed body, which GZipMiddleware passes through.
+    """
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if gzip_body is not None:
+        headers["Vary"] = "Accept-Encoding"
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            # Each encoding is a different representation, so it gets its own strong ETag
+            etag = headers["ETag"] = f'{etag[:-1]}-gzip"'
+            body = gzip_body
+            headers["Content-Encoding"] = "gzip"
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
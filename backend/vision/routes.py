@@ -1,67 +1,435 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.routing import APIRoute
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.parser import ParseFailedException
+from streaming_form_data.targets import BaseTarget, ValueTarget
+import asyncio
+import contextlib
+import multiprocessing
+from functools import lru_cache
+import types
 import tempfile
+import threading
 import os
 import time
-from typing import Optional
-import aiofiles
+from multiprocessing.connection import Connection
+from typing import Any, AsyncIterator, BinaryIO, Callable, Coroutine, List, Optional, Tuple, Union
 
 from .schema import (
-    VideoAnalysisRequest, AnalysisResponse, 
+    AnalysisResponse, 
     ErrorResponse, HealthCheckResponse, ServiceInfoResponse,
-    ExerciseType
+    ExerciseType, ExerciseAnalysisResult, RepetitionData
 )
-from .service import vision_service
+from .service import (
+    vision_service, get_analysis_pool, close_analysis_pool, analyze_video_worker,
+    stream_video_worker, warm_up_worker, ANALYSIS_WORKERS, WARM_UP_WORKERS
+)
+from backend.utils.helpers import json_bytes, json_etag, cached_json_response
+
+class UploadLimitRoute(APIRoute):
+    """Route that rejects oversized requests from Content-Length before the body is read"""
+    
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        route_handler = super().get_route_handler()
+        
+        async def upload_limit_handler(request: Request) -> Response:
+            # FastAPI parses the form before the endpoint runs, so this is the last chance to skip the transfer
+            content_length = request.headers.get("content-length")
+            if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_SIZE:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+                )
+            return await route_handler(request)
+        
+        return upload_limit_handler
 
 # Create router instance
-router = APIRouter(prefix="/vision", tags=["Vision Analysis"])
+router = APIRouter(
+    prefix="/vision",
+    tags=["Vision Analysis"],
+    route_class=UploadLimitRoute,
+    default_response_class=ORJSONResponse
+)
 
 # Supported video formats
 SUPPORTED_FORMATS = [".mp4", ".avi", ".mov", ".mkv", ".wmv"]
+SUPPORTED_EXTENSIONS = frozenset(fmt.lstrip(".") for fmt in SUPPORTED_FORMATS)
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+MAX_REQUEST_SIZE = MAX_FILE_SIZE + 64 * 1024  # Room for multipart framing and form fields
 MAX_VIDEO_DURATION = 300  # 5 minutes
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
-async def validate_video_file(file: UploadFile) -> str:
-    """Validate uploaded video file and return temp path"""
-    if not file:
-        raise HTTPException(status_code=400, detail="No file uploaded")
+# The analyze-video body is parsed by hand, so its multipart schema is declared for the docs
+ANALYZE_VIDEO_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["exercise_type", "file"],
+                    "properties": {
+                        "exercise_type": {
+                            "type": "string",
+                            "enum": [exercise.value for exercise in ExerciseType],
+                            "description": "Type of exercise to analyze"
+                        },
+                        "file": {
+                            "type": "string",
+                            "format": "binary",
+                            "description": "Video file to analyze"
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+
+# Cache lifetimes for static and health responses, in seconds
+STATIC_MAX_AGE = 300
+HEALTH_MAX_AGE = 5
+
+# Resolved once, gettempdir() probes the filesystem on first call
+_TMPDIR = tempfile.gettempdir()
+
+# Uploads held in memory at once, each can take up to MAX_FILE_SIZE of RAM; further ones go to disk
+MEMFD_MAX_UPLOADS = int(os.getenv("VISION_MEMFD_UPLOADS", 4))
+_memfd_slots = threading.BoundedSemaphore(MEMFD_MAX_UPLOADS)
+
+# Exercise-specific analysis parameters and form guidelines
+_EXERCISE_INFO = types.MappingProxyType({
+    "squats": {
+        "description": "Analyzes squat form focusing on knee and hip angles",
+        "key_metrics": ["knee_angle", "hip_angle", "back_position"],
+        "form_tips": [
+            "Keep knees aligned with toes",
+            "Maintain straight back",
+            "Descend until thighs are parallel to ground",
+            "Keep chest up"
+        ],
+        "common_mistakes": [
+            "Knees caving inward",
+            "Not squatting deep enough", 
+            "Leaning forward excessively"
+        ]
+    },
+    "pushups": {
+        "description": "Analyzes push-up form focusing on elbow angles and body alignment",
+        "key_metrics": ["elbow_angle", "body_alignment", "head_position"],
+        "form_tips": [
+            "Keep body in straight line",
+            "Lower chest to ground level",
+            "Keep elbows at 45-degree angle",
+            "Maintain neutral head position"
+        ],
+        "common_mistakes": [
+            "Sagging hips",
+            "Partial range of motion",
+            "Flaring elbows too wide",
+            "Looking up or down"
+        ]
+    },
+    "lunges": {
+        "description": "Analyzes lunge form focusing on knee positioning and balance", 
+        "key_metrics": ["front_knee_angle", "back_knee_angle", "balance"],
+        "form_tips": [
+            "Keep front knee over ankle",
+            "Lower back knee toward ground",
+            "Maintain upright torso",
+            "Step back to starting position"
+        ],
+        "common_mistakes": [
+            "Front knee going past toes",
+            "Not lowering enough",
+            "Leaning forward",
+            "Poor balance"
+        ]
+    },
+    "planks": {
+        "description": "Measures plank hold time and analyzes body alignment",
+        "key_metrics": ["back_alignment", "hip_position", "hold_duration"],
+        "form_tips": [
+            "Keep body in straight line",
+            "Engage core muscles",
+            "Maintain neutral spine",
+            "Keep head in line with spine"
+        ],
+        "common_mistakes": [
+            "Hips too high or low",
+            "Arching back",
+            "Looking up",
+            "Not engaging core"
+        ]
+    }
+})
+
+# Full /exercises/{exercise_type}/info responses, built once at import
+_EXERCISE_RESPONSES = types.MappingProxyType({
+    exercise_type: {"exercise_type": exercise_type, **info}
+    for exercise_type, info in _EXERCISE_INFO.items()
+})
+
+# Static payloads, serialized once at import
+_INFO_BYTES = json_bytes(ServiceInfoResponse(
+    supported_exercises=["squats", "pushups", "lunges", "planks"],
+    supported_formats=SUPPORTED_FORMATS,
+    max_video_duration=MAX_VIDEO_DURATION,
+    max_file_size=MAX_FILE_SIZE // (1024 * 1024),  # Convert to MB
+    pose_detection_model="MediaPipe Pose"
+).model_dump())
+_EXERCISE_INFO_BYTES = types.MappingProxyType({
+    exercise_type: json_bytes(response)
+    for exercise_type, response in _EXERCISE_RESPONSES.items()
+})
+
+# Static bodies only change on deploy, so their ETags are fixed at import
+_INFO_ETAG = json_etag(_INFO_BYTES)
+_EXERCISE_INFO_ETAGS = types.MappingProxyType({
+    exercise_type: json_etag(body)
+    for exercise_type, body in _EXERCISE_INFO_BYTES.items()
+})
+
+@lru_cache(maxsize=None)
+def _health_body(service_ready: bool, mediapipe_available: bool, opencv_available: bool) -> Tuple[bytes, str]:
+    """Serialized health body and its ETag, built once per combination of component states"""
+    body = json_bytes(HealthCheckResponse(
+        status="healthy" if service_ready else "unhealthy",
+        service="vision",
+        message="Vision service is ready" if service_ready else "Vision service has issues",
+        mediapipe_available=mediapipe_available,
+        opencv_available=opencv_available
+    ).model_dump())
+    return body, json_etag(body)
+
+@lru_cache(maxsize=None)
+def memfd_uploads_available() -> bool:
+    """Whether in-memory uploads work here: memfd_create exists and /proc exposes this process's files"""
+    if not hasattr(os, "memfd_create"):
+        return False
     
-    # Check file extension
-    file_ext = os.path.splitext(file.filename)[1].lower()
-    if file_ext not in SUPPORTED_FORMATS:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Unsupported file format. Supported formats: {', '.join(SUPPORTED_FORMATS)}"
-        )
+    fd = os.memfd_create("vision_upload_check", os.MFD_CLOEXEC)
+    try:
+        with open(f"/proc/{os.getpid()}/fd/{fd}", "rb"):
+            return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+
+def create_upload_file(file_ext: str) -> str:
+    """Create the file an upload is copied into and return a path the analysis workers can open"""
+    # Anonymous in-memory file on Linux, workers open it through this process's /proc entry
+    if memfd_uploads_available() and _memfd_slots.acquire(blocking=False):
+        try:
+            fd = os.memfd_create("vision_upload", os.MFD_CLOEXEC)
+        except OSError:
+            _memfd_slots.release()
+        else:
+            return f"/proc/{os.getpid()}/fd/{fd}"
+    
+    # Fall back to a uniquely named temporary file on disk, never derived from the client filename
+    fd, temp_path = tempfile.mkstemp(prefix="upload_", suffix=f".{file_ext}", dir=_TMPDIR)
+    os.close(fd)
+    return temp_path
+
+def is_memfd_path(path: str) -> bool:
+    """Whether a path refers to an in-memory upload created by create_upload_file"""
+    return path.startswith(f"/proc/{os.getpid()}/fd/")
+
+def remove_upload_file(path: str) -> None:
+    """Release an uploaded video, closing the in-memory file or deleting the temp file"""
+    if is_memfd_path(path):
+        os.close(int(path.rsplit("/", 1)[1]))
+        _memfd_slots.release()
+    else:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+class VideoUploadTarget(BaseTarget):
+    """Multipart target that checks the file name as it arrives and writes the video straight to its upload file"""
     
-    # Check file size
-    if hasattr(file, 'size') and file.size > MAX_FILE_SIZE:
+    def __init__(self) -> None:
+        super().__init__()
+        self.temp_path: Optional[str] = None
+        self.error: Optional[HTTPException] = None
+        self._file: Optional[BinaryIO] = None
+        self._total_size = 0
+    
+    def on_start(self) -> None:
+        if self.temp_path is not None:
+            self.error = HTTPException(status_code=400, detail="Only one video file can be uploaded")
+            return
+        
+        # Check file extension
+        _, dot, file_ext = (self.multipart_filename or "").rpartition(".")
+        if not dot or file_ext.lower() not in SUPPORTED_EXTENSIONS:
+            self.error = HTTPException(
+                status_code=400, 
+                detail=f"Unsupported file format. Supported formats: {', '.join(SUPPORTED_FORMATS)}"
+            )
+            return
+        
+        self.temp_path = create_upload_file(file_ext.lower())
+        self._file = open(self.temp_path, 'wb', buffering=UPLOAD_CHUNK_SIZE)
+    
+    def on_data_received(self, chunk: bytes) -> None:
+        if self._file is None:
+            return
+        
+        # Reject the upload as soon as it exceeds the limit
+        self._total_size += len(chunk)
+        if self._total_size > MAX_FILE_SIZE:
+            self.error = HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+            )
+            self.close()
+            return
+        
+        self._file.write(chunk)
+    
+    def on_finish(self) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Flush and close the upload file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def discard(self) -> None:
+        """Close and release the upload file after a failed request"""
+        self.close()
+        if self.temp_path is not None:
+            with contextlib.suppress(OSError):
+                remove_upload_file(self.temp_path)
+            self.temp_path = None
+
+def feed_upload_parser(parser: StreamingFormDataParser, chunks: List[bytes]) -> None:
+    """Parse a batch of body chunks, the video data is written to its upload file as it is parsed"""
+    for chunk in chunks:
+        parser.data_received(chunk)
+
+async def receive_video_upload(request: Request) -> Tuple[ExerciseType, str]:
+    """Parse the multipart body as it arrives, returns the exercise type and the path the video was saved to"""
+    try:
+        parser = StreamingFormDataParser(headers=request.headers)
+    except ParseFailedException as e:
+        raise HTTPException(status_code=400, detail=f"Expected a multipart/form-data upload: {str(e)}")
+    
+    exercise_target = ValueTarget()
+    file_target = VideoUploadTarget()
+    parser.register("exercise_type", exercise_target)
+    parser.register("file", file_target)
+    
+    try:
+        # Parsing writes to the upload file, so it runs in a thread, a batch of about
+        # UPLOAD_CHUNK_SIZE at a time rather than once per received chunk
+        pending: List[bytes] = []
+        pending_size = 0
+        async for chunk in request.stream():
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size < UPLOAD_CHUNK_SIZE:
+                continue
+            
+            await asyncio.to_thread(feed_upload_parser, parser, pending)
+            pending, pending_size = [], 0
+            if file_target.error is not None:
+                raise file_target.error
+        
+        await asyncio.to_thread(feed_upload_parser, parser, pending)
+        if file_target.error is not None:
+            raise file_target.error
+        await asyncio.to_thread(file_target.close)
+    except HTTPException:
+        file_target.discard()
+        raise
+    except Exception as e:
+        file_target.discard()
+        raise HTTPException(status_code=500, detail=f"Failed to process upload: {str(e)}")
+    
+    if file_target.temp_path is None:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+    
+    try:
+        exercise_type = ExerciseType(exercise_target.value.decode("utf-8").strip())
+    except ValueError:
+        file_target.discard()
         raise HTTPException(
-            status_code=413, 
-            detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+            status_code=422,
+            detail=f"Invalid exercise_type. Supported exercises: {', '.join(e.value for e in ExerciseType)}"
         )
     
-    # Create temporary file
-    temp_dir = tempfile.gettempdir()
-    temp_filename = f"upload_{int(time.time())}_{file.filename}"
-    temp_path = os.path.join(temp_dir, temp_filename)
+    return exercise_type, file_target.temp_path
+
+def receive_analysis_item(receiver: Connection, future: asyncio.Future) -> Any:
+    """Wait for the next streamed analysis item, None once the worker is finished or gone"""
+    while not receiver.poll(0.5):
+        if future.done():
+            return None
+    return receiver.recv()
+
+async def stream_analysis(temp_path: str, exercise_type: str, start_time: float) -> AsyncIterator[bytes]:
+    """Run a streaming analysis in the pool and emit NDJSON lines: one per rep or plank session, then the summary"""
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    future = asyncio.get_running_loop().run_in_executor(
+        get_analysis_pool(), stream_video_worker, temp_path, exercise_type, sender
+    )
     
     try:
-        # Save uploaded file to temporary location
-        async with aiofiles.open(temp_path, 'wb') as temp_file:
-            content = await file.read()
-            if len(content) > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
-                )
-            await temp_file.write(content)
+        result = None
+        while (item := await asyncio.to_thread(receive_analysis_item, receiver, future)) is not None:
+            if isinstance(item, ExerciseAnalysisResult):
+                result = item
+            else:
+                event = "repetition" if isinstance(item, RepetitionData) else "plank_session"
+                yield json_bytes({"event": event, "data": item.model_dump()}) + b"\n"
         
-        return temp_path
+        await future
+        yield json_bytes({"event": "summary", "data": AnalysisResponse(
+            success=True,
+            message="Video analysis completed successfully",
+            result=result,
+            processing_time=time.time() - start_time
+        ).model_dump()}) + b"\n"
+    
     except Exception as e:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        raise HTTPException(status_code=500, detail=f"Failed to process upload: {str(e)}")
+        # Headers are already sent, so errors are reported in-band
+        yield json_bytes({"event": "error", "data": {"message": f"Analysis failed: {str(e)}"}}) + b"\n"
+    finally:
+        # After a client disconnect the worker fails writing to the closed pipe; cancelling the
+        # future, or retrieving its exception, keeps that from being logged as never retrieved
+        if not future.done():
+            future.cancel()
+        elif not future.cancelled():
+            future.exception()
+        receiver.close()
+        sender.close()
+
+async def start_vision() -> None:
+    """With VISION_WARM_UP_WORKERS, start every analysis worker so their Pose graphs are built before the first upload"""
+    if not WARM_UP_WORKERS:
+        return
+    
+    loop = asyncio.get_running_loop()
+    try:
+        await asyncio.gather(*(
+            loop.run_in_executor(get_analysis_pool(), warm_up_worker)
+            for _ in range(ANALYSIS_WORKERS)
+        ))
+    except Exception as e:
+        print(f"Warning: Could not start video analysis workers: {e}")
+
+async def stop_vision() -> None:
+    """Stop the video analysis worker processes and release the Pose graph, run by the app lifespan"""
+    close_analysis_pool()
+    vision_service.close()
 
 @router.post("/analyze-video", 
              response_model=AnalysisResponse,
@@ -70,11 +438,9 @@ async def validate_video_file(file: UploadFile) -> str:
                  413: {"model": ErrorResponse, "description": "File Too Large"},
                  422: {"model": ErrorResponse, "description": "Validation Error"},
                  500: {"model": ErrorResponse, "description": "Internal Server Error"}
-             })
-async def analyze_video(
-    exercise_type: ExerciseType = Form(..., description="Type of exercise to analyze"),
-    file: UploadFile = File(..., description="Video file to analyze")
-) -> AnalysisResponse:
+             },
+             openapi_extra=ANALYZE_VIDEO_REQUEST_BODY)
+async def analyze_video(request: Request) -> Union[AnalysisResponse, StreamingResponse]:
     """
     Analyze uploaded video for exercise form and repetition counting.
     
@@ -92,16 +458,31 @@ async def analyze_video(
     - Exercise analysis results including rep counts or plank duration
     - Form quality scores and detailed feedback
     - Timestamped corrections and suggestions
+    
+    Send `Accept: application/x-ndjson` to stream one JSON line per completed
+    rep or plank session, followed by a summary line with the full response.
     """
     temp_path = None
     start_time = time.time()
     
     try:
         # Validate and save uploaded file
-        temp_path = await validate_video_file(file)
+        exercise_type, temp_path = await receive_video_upload(request)
         
-        # Analyze video using vision service
-        result = vision_service.analyze_video_file(temp_path, exercise_type.value)
+        if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            # The upload is released once the stream finishes, not when this handler returns
+            upload_path, temp_path = temp_path, None
+            return StreamingResponse(
+                stream_analysis(upload_path, exercise_type.value, start_time),
+                # main.py's gzip middleware skips requests accepting NDJSON, so lines are sent as they are ready
+                media_type=NDJSON_MEDIA_TYPE,
+                background=BackgroundTask(remove_upload_file, upload_path)
+            )
+        
+        # Analyze video in a worker process so the event loop stays responsive
+        result = await asyncio.get_running_loop().run_in_executor(
+            get_analysis_pool(), analyze_video_worker, temp_path, exercise_type.value
+        )
         
         processing_time = time.time() - start_time
         
@@ -122,33 +503,27 @@ async def analyze_video(
             detail=f"Analysis failed: {str(e)}"
         )
     finally:
-        # Clean up temporary file
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except:
-                pass
+        # Clean up uploaded file
+        if temp_path:
+            with contextlib.suppress(OSError):
+                remove_upload_file(temp_path)
 
 @router.get("/health", response_model=HealthCheckResponse)
-async def health_check() -> HealthCheckResponse:
+async def health_check(request: Request) -> Union[Response, HealthCheckResponse]:
     """
     Check the health status of the vision analysis service.
     
     Verifies that MediaPipe and OpenCV are properly installed and functioning.
     """
     try:
-        health_status = vision_service.check_service_health()
-        
-        status = "healthy" if health_status["service_ready"] else "unhealthy"
-        message = "Vision service is ready" if health_status["service_ready"] else "Vision service has issues"
+        health_status = await asyncio.to_thread(vision_service.check_service_health)
         
-        return HealthCheckResponse(
-            status=status,
-            service="vision",
-            message=message,
-            mediapipe_available=health_status["mediapipe_available"],
-            opencv_available=health_status["opencv_available"]
+        body, etag = _health_body(
+            health_status["service_ready"],
+            health_status["mediapipe_available"],
+            health_status["opencv_available"]
         )
+        return cached_json_response(request, body, etag, HEALTH_MAX_AGE)
         
     except Exception as e:
         return HealthCheckResponse(
@@ -160,97 +535,23 @@ async def health_check() -> HealthCheckResponse:
         )
 
 @router.get("/info", response_model=ServiceInfoResponse)
-async def get_service_info() -> ServiceInfoResponse:
+async def get_service_info(request: Request) -> Response:
     """
     Get information about the vision analysis service capabilities.
     
     Returns supported exercises, video formats, and service limitations.
     """
-    return ServiceInfoResponse(
-        supported_exercises=["squats", "pushups", "lunges", "planks"],
-        supported_formats=SUPPORTED_FORMATS,
-        max_video_duration=MAX_VIDEO_DURATION,
-        max_file_size=MAX_FILE_SIZE // (1024 * 1024),  # Convert to MB
-        pose_detection_model="MediaPipe Pose"
-    )
+    return cached_json_response(request, _INFO_BYTES, _INFO_ETAG, STATIC_MAX_AGE)
 
 @router.get("/exercises/{exercise_type}/info")
-async def get_exercise_info(exercise_type: ExerciseType):
+async def get_exercise_info(exercise_type: ExerciseType, request: Request) -> Response:
     """
     Get specific information about an exercise type.
     
     Returns exercise-specific analysis parameters and form guidelines.
     """
-    exercise_info = {
-        "squats": {
-            "description": "Analyzes squat form focusing on knee and hip angles",
-            "key_metrics": ["knee_angle", "hip_angle", "back_position"],
-            "form_tips": [
-                "Keep knees aligned with toes",
-                "Maintain straight back",
-                "Descend until thighs are parallel to ground",
-                "Keep chest up"
-            ],
-            "common_mistakes": [
-                "Knees caving inward",
-                "Not squatting deep enough", 
-                "Leaning forward excessively"
-            ]
-        },
-        "pushups": {
-            "description": "Analyzes push-up form focusing on elbow angles and body alignment",
-            "key_metrics": ["elbow_angle", "body_alignment", "head_position"],
-            "form_tips": [
-                "Keep body in straight line",
-                "Lower chest to ground level",
-                "Keep elbows at 45-degree angle",
-                "Maintain neutral head position"
-            ],
-            "common_mistakes": [
-                "Sagging hips",
-                "Partial range of motion",
-                "Flaring elbows too wide",
-                "Looking up or down"
-            ]
-        },
-        "lunges": {
-            "description": "Analyzes lunge form focusing on knee positioning and balance", 
-            "key_metrics": ["front_knee_angle", "back_knee_angle", "balance"],
-            "form_tips": [
-                "Keep front knee over ankle",
-                "Lower back knee toward ground",
-                "Maintain upright torso",
-                "Step back to starting position"
-            ],
-            "common_mistakes": [
-                "Front knee going past toes",
-                "Not lowering enough",
-                "Leaning forward",
-                "Poor balance"
-            ]
-        },
-        "planks": {
-            "description": "Measures plank hold time and analyzes body alignment",
-            "key_metrics": ["back_alignment", "hip_position", "hold_duration"],
-            "form_tips": [
-                "Keep body in straight line",
-                "Engage core muscles",
-                "Maintain neutral spine",
-                "Keep head in line with spine"
-            ],
-            "common_mistakes": [
-                "Hips too high or low",
-                "Arching back",
-                "Looking up",
-                "Not engaging core"
-            ]
-        }
-    }
-    
-    if exercise_type.value not in exercise_info:
+    body = _EXERCISE_INFO_BYTES.get(exercise_type.value)
+    if body is None:
         raise HTTPException(status_code=404, detail="Exercise type not found")
     
-    return {
-        "exercise_type": exercise_type.value,
-        **exercise_info[exercise_type.value]
-    }
\ No newline at end of file
+    return cached_json_response(request, body, _EXERCISE_INFO_ETAGS[exercise_type.value], STATIC_MAX_AGE)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from enum import Enum
 
@@ -9,10 +9,9 @@ class ExerciseType(str, Enum):
     PLANKS = "planks"
 
 class VideoAnalysisRequest(BaseModel):
-    exercise_type: ExerciseType = Field(..., description="Type of exercise to analyze")
+    model_config = ConfigDict(use_enum_values=True)
     
-    class Config:
-        use_enum_values = True
+    exercise_type: ExerciseType = Field(..., description="Type of exercise to analyze")
 
 class FormFeedback(BaseModel):
     timestamp: float = Field(..., description="Timestamp in video when feedback applies")
@@ -23,33 +22,21 @@ class RepetitionData(BaseModel):
     rep_number: int = Field(..., description="Repetition number")
     timestamp: float = Field(..., description="Timestamp when rep was completed")
     form_quality: float = Field(..., ge=0, le=1, description="Form quality score (0-1)")
-    feedback: List[str] = Field(default=[], description="Feedback for this repetition")
+    feedback: List[str] = Field(default_factory=list, description="Feedback for this repetition")
 
 class PlankData(BaseModel):
     start_time: float = Field(..., description="When plank position was achieved")
     end_time: Optional[float] = Field(None, description="When plank position was lost")
     duration: float = Field(..., description="Duration in seconds")
     form_quality: float = Field(..., ge=0, le=1, description="Average form quality")
-    feedback: List[str] = Field(default=[], description="Form feedback during plank")
-
-class PoseKeypoint(BaseModel):
-    x: float = Field(..., description="X coordinate (normalized 0-1)")
-    y: float = Field(..., description="Y coordinate (normalized 0-1)")
-    z: Optional[float] = Field(None, description="Z coordinate (depth)")
-    visibility: float = Field(..., ge=0, le=1, description="Visibility score")
-
-class FrameAnalysis(BaseModel):
-    frame_number: int = Field(..., description="Frame number in video")
-    timestamp: float = Field(..., description="Timestamp in seconds")
-    pose_detected: bool = Field(..., description="Whether pose was detected in frame")
-    key_angles: Dict[str, float] = Field(default={}, description="Key angles for the exercise")
-    form_score: float = Field(..., ge=0, le=1, description="Form score for this frame")
-    in_position: bool = Field(..., description="Whether person is in correct exercise position")
+    feedback: List[str] = Field(default_factory=list, description="Form feedback during plank")
 
 class ExerciseAnalysisResult(BaseModel):
     exercise_type: str = Field(..., description="Type of exercise analyzed")
-    total_frames: int = Field(..., description="Total frames processed")
-    frames_with_pose: int = Field(..., description="Frames where pose was detected")
+    total_frames: int = Field(..., description="Total frames in the video")
+    # Frames are sampled down to VISION_ANALYSIS_FPS, so the detection rate is frames_with_pose / analyzed_frames
+    analyzed_frames: int = Field(..., description="Sampled frames run through pose detection")
+    frames_with_pose: int = Field(..., description="Analyzed frames where pose was detected")
     analysis_duration: float = Field(..., description="Total analysis time in seconds")
     
     # Exercise-specific results
@@ -57,13 +44,13 @@ class ExerciseAnalysisResult(BaseModel):
     plank_duration: Optional[float] = Field(None, description="Total plank duration in seconds")
     
     # Detailed data
-    repetitions: List[RepetitionData] = Field(default=[], description="Detailed repetition data")
-    plank_sessions: List[PlankData] = Field(default=[], description="Plank session data")
+    repetitions: List[RepetitionData] = Field(default_factory=list, description="Detailed repetition data")
+    plank_sessions: List[PlankData] = Field(default_factory=list, description="Plank session data")
     
     # Overall feedback
     average_form_score: float = Field(..., ge=0, le=1, description="Average form quality score")
-    overall_feedback: List[str] = Field(default=[], description="Overall exercise feedback")
-    form_feedback: List[FormFeedback] = Field(default=[], description="Timestamped form feedback")
+    overall_feedback: List[str] = Field(default_factory=list, description="Overall exercise feedback")
+    form_feedback: List[FormFeedback] = Field(default_factory=list, description="Timestamped form feedback")
     
     # Performance metrics
     best_rep_quality: Optional[float] = Field(None, description="Best repetition quality score")
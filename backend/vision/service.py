@@ -3,25 +3,330 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import math
+import multiprocessing
+import os
+import queue
+import threading
 import time
-from typing import List, Dict, Tuple, Optional, Any
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain, repeat
+from multiprocessing.connection import Connection
+from typing import List, Dict, Tuple, Optional, Any, Iterator, Union
+from backend.utils.helpers import njit
 from .schema import (
     ExerciseAnalysisResult, RepetitionData, PlankData, 
-    FormFeedback, FrameAnalysis, PoseKeypoint
+    FormFeedback
 )
 
+# Web worker processes per host (main.py, gunicorn.conf.py), each one runs its own analysis pool
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", 4)))
+
+# Worker processes for CPU-bound video analysis, per web worker; by default half the cores are
+# split across the web workers so a host runs about cpu_count() / 2 MediaPipe processes in total
+ANALYSIS_WORKERS = int(os.getenv(
+    "VISION_ANALYSIS_WORKERS",
+    max(1, (os.cpu_count() or 2) // 2 // WEB_CONCURRENCY)
+))
+
+# Start every analysis worker, and build its Pose graph, at startup instead of on the first
+# upload; off by default so idle web workers don't each hold ANALYSIS_WORKERS graphs
+WARM_UP_WORKERS = os.getenv("VISION_WARM_UP_WORKERS", "false").lower() == "true"
+
+# Optional NVDEC decoding via torchcodec, only used for videos at least this long (seconds)
+NVDEC_MIN_DURATION = float(os.getenv("VISION_NVDEC_MIN_DURATION", 30))
+NVDEC_BATCH_SIZE = 32
+
+# Hardware video decoding (VAAPI, D3D11, ...) through OpenCV's FFmpeg backend when the
+# OpenCV reader is used; FFmpeg falls back to software decoding where there is none
+HW_DECODE = os.getenv("VISION_HW_DECODE", "true").lower() == "true"
+
+@lru_cache(maxsize=None)
+def _log_software_decode():
+    """Log the hardware decoding fallback once per process rather than for every video"""
+    print("Hardware video decoding unavailable, decoding on the CPU")
+
+def open_hw_capture(video_path: str) -> Optional[cv2.VideoCapture]:
+    """OpenCV capture that requests hardware decoding, or None if the video can't be opened that way"""
+    cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+    if not cap.isOpened():
+        cap.release()
+        return None
+    
+    if cap.get(cv2.CAP_PROP_HW_ACCELERATION) == cv2.VIDEO_ACCELERATION_NONE:
+        _log_software_decode()
+    return cap
+
+# Optional decord decoding on the CPU (requirements-optional.txt), decodes straight to RGB in
+# batches of frames; preferred over the OpenCV reader whenever it is installed
+DECORD_BATCH_SIZE = 16
+
+@lru_cache(maxsize=None)
+def decord_available() -> bool:
+    """Whether decord is installed, checked once per process"""
+    try:
+        import decord
+    except ImportError:
+        return False
+    return True
+
+# Optional MediaPipe Tasks pose landmarker model (.task), run with the GPU delegate.
+# When unset, or when the GPU delegate can't be created, the CPU solutions Pose graph is used
+POSE_TASK_MODEL = os.getenv("VISION_POSE_TASK_MODEL")
+
+# Pose sessions per process. Analyses run one video at a time in each analysis pool
+# worker, so one is enough there; more allow concurrent analyses in one process
+POSE_POOL_SIZE = max(1, int(os.getenv("VISION_POSE_POOL_SIZE", 1)))
+
+# Frame rate pose inference is run at, higher frame rate videos are subsampled to it.
+# Reps take a second or more, so 15 fps is plenty to follow them; 0 analyzes every frame
+ANALYSIS_FPS = float(os.getenv("VISION_ANALYSIS_FPS", 15))
+
+def frame_stride(fps: float) -> int:
+    """Analyze every Nth frame of a video with the given frame rate"""
+    if ANALYSIS_FPS <= 0 or fps <= 0:
+        return 1
+    return max(1, round(fps / ANALYSIS_FPS))
+
+# Frames wider than this are downscaled before pose inference; MediaPipe landmarks
+# are normalized to [0, 1], so the angles don't depend on the resolution
+ANALYSIS_FRAME_WIDTH = 640
+
+def analysis_frame_size(width: int, height: int) -> Optional[Tuple[int, int]]:
+    """(width, height) to downscale a frame to before inference, or None to keep it as is"""
+    if width <= ANALYSIS_FRAME_WIDTH:
+        return None
+    return ANALYSIS_FRAME_WIDTH, max(1, round(height * ANALYSIS_FRAME_WIDTH / width))
+
+# Decoded frames buffered ahead of pose inference by the decode thread
+FRAME_QUEUE_SIZE = 8
+
+# OpenCV decodes into a ring of reused RGB buffers: enough for a full prefetch queue,
+# the frame being analyzed and the frame being decoded
+FRAME_BUFFERS = FRAME_QUEUE_SIZE + 2
+
+@lru_cache(maxsize=None)
+def nvdec_available() -> bool:
+    """Whether torchcodec and a CUDA device are available, checked once per process"""
+    try:
+        import torch
+        import torchcodec
+    except ImportError:
+        return False
+    return torch.cuda.is_available()
+
+# Pose frames buffered before their joint angles are computed together
+ANGLE_WINDOW = 32
+
+# Keypoint arrays are float32: half the bytes of float64, and far more precision than
+# the landmarks themselves have, so the angle math runs on float32 throughout
+KEYPOINT_DTYPE = np.float32
+
+# Keypoints used in the analysis, in the row order of the keypoint arrays
+KEYPOINT_NAMES = (
+    "nose",
+    "left_shoulder", "right_shoulder", "left_elbow", "right_elbow",
+    "left_wrist", "right_wrist", "left_hip", "right_hip",
+    "left_knee", "right_knee", "left_ankle", "right_ankle"
+)
+KEYPOINT_INDEX = {name: i for i, name in enumerate(KEYPOINT_NAMES)}
+
+# MediaPipe landmark id of each keypoint row
+LANDMARK_IDS = np.array(
+    [mp.solutions.pose.PoseLandmark[name.upper()].value for name in KEYPOINT_NAMES],
+    dtype=np.int32
+)
+
+# Joint angles measured for each exercise: name -> (first point, vertex, last point)
+EXERCISE_ANGLES = {
+    "squats": (
+        ("left_knee", "right_knee", "left_hip"),
+        (
+            ("left_hip", "left_knee", "left_ankle"),
+            ("right_hip", "right_knee", "right_ankle"),
+            ("left_shoulder", "left_hip", "left_knee")
+        )
+    ),
+    "pushups": (
+        ("left_elbow", "right_elbow", "body_angle"),
+        (
+            ("left_shoulder", "left_elbow", "left_wrist"),
+            ("right_shoulder", "right_elbow", "right_wrist"),
+            ("left_shoulder", "left_hip", "left_ankle")
+        )
+    ),
+    "lunges": (
+        # Assumes the left leg is in front
+        ("front_knee", "back_knee"),
+        (
+            ("left_hip", "left_knee", "left_ankle"),
+            ("right_hip", "right_knee", "right_ankle")
+        )
+    ),
+    "planks": (
+        ("back_angle", "left_elbow"),
+        (
+            ("left_shoulder", "left_hip", "left_ankle"),
+            ("left_shoulder", "left_elbow", "left_wrist")
+        )
+    )
+}
+
+# (K, 3) keypoint row indices of each exercise's angle triplets
+EXERCISE_ANGLE_INDICES = {
+    exercise_type: np.array([[KEYPOINT_INDEX[name] for name in triplet] for triplet in triplets])
+    for exercise_type, (_, triplets) in EXERCISE_ANGLES.items()
+}
+
+# Angles averaged into the primary angle that drives rep counting
+EXERCISE_REP_ANGLES = {
+    "squats": ("left_knee", "right_knee"),
+    "pushups": ("left_elbow", "right_elbow"),
+    "lunges": ("front_knee",)
+}
+
+# Column indices of the rep angles in each exercise's angle arrays
+EXERCISE_REP_ANGLE_COLUMNS = {
+    exercise_type: np.array([EXERCISE_ANGLES[exercise_type][0].index(name) for name in names])
+    for exercise_type, names in EXERCISE_REP_ANGLES.items()
+}
+
+def joint_angles(points: np.ndarray) -> np.ndarray:
+    """Angles in degrees at the vertex of (..., 3, 2) point triplets, vectorized over leading axes"""
+    ba = points[..., 0, :] - points[..., 1, :]
+    bc = points[..., 2, :] - points[..., 1, :]
+    
+    dot = np.einsum('...i,...i->...', ba, bc)
+    cross = ba[..., 0] * bc[..., 1] - ba[..., 1] * bc[..., 0]
+    return np.degrees(np.arctan2(np.abs(cross), dot))
+
+# Landmarks at or below this visibility are treated as missing
+VISIBILITY_THRESHOLD = 0.5
+
+def visible_joint_angles(keypoints: np.ndarray) -> np.ndarray:
+    """Joint angles of (..., 3, 4) keypoint triplets, NaN where any of the three points isn't visible"""
+    visible = (keypoints[..., 3] > VISIBILITY_THRESHOLD).all(axis=-1)
+    return np.where(visible, joint_angles(keypoints[..., :2]), np.nan)
+
+@dataclass(slots=True)
+class RunningStats:
+    """Mean and population standard deviation updated one value at a time (Welford's algorithm)"""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0  # sum of squared deviations from the mean
+    
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+    
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+# Form scores averaged into a plank session's form quality
+PLANK_FORM_WINDOW = 10
+
+# Rep counter positions, integers so the state machine compiles with numba
+POSITION_UNKNOWN = -1
+POSITION_UP = 0
+POSITION_DOWN = 1
+
+@njit(cache=True)
+def count_rep(position: int, angle: float, down_threshold: float, up_threshold: float) -> Tuple[int, bool]:
+    """Advance the up/down rep state machine by one frame, returns (new position, rep completed)"""
+    # A missing (NaN) angle leaves the position unchanged
+    if math.isnan(angle):
+        return position, False
+    if position == POSITION_UP and angle < down_threshold:
+        return POSITION_DOWN, False
+    if position == POSITION_DOWN and angle > up_threshold:
+        return POSITION_UP, True
+    if position == POSITION_UNKNOWN:
+        return (POSITION_UP if angle > up_threshold else POSITION_DOWN), False
+    return position, False
+
+@njit(cache=True)
+def count_reps(position: int, angles: np.ndarray, down_threshold: float, up_threshold: float) -> Tuple[int, np.ndarray]:
+    """Run the rep state machine over a series of primary angles, returns (final position, rep completed per frame)"""
+    completed = np.zeros(angles.shape[0], dtype=np.bool_)
+    for i in range(angles.shape[0]):
+        position, completed[i] = count_rep(position, angles[i], down_threshold, up_threshold)
+    return position, completed
+
+# Compile at import so the first analysis doesn't pay the JIT cost
+count_rep(POSITION_UNKNOWN, 180.0, 90, 160)
+count_reps(POSITION_UNKNOWN, np.full(2, 180.0, dtype=KEYPOINT_DTYPE), 90, 160)
+
+def create_gpu_landmarker(model_path: str):
+    """MediaPipe Tasks pose landmarker on the GPU delegate, or None if it can't be created"""
+    try:
+        from mediapipe.tasks.python import BaseOptions
+        from mediapipe.tasks.python.vision import PoseLandmarker, PoseLandmarkerOptions, RunningMode
+        
+        options = PoseLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path, delegate=BaseOptions.Delegate.GPU),
+            running_mode=RunningMode.VIDEO,
+            num_poses=1,
+            min_pose_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+        return PoseLandmarker.create_from_options(options)
+    except Exception as e:
+        print(f"GPU pose landmarker unavailable, using the CPU Pose graph: {e}")
+        return None
+
+class PoseSession:
+    """One MediaPipe pose graph; graphs aren't safe for concurrent use, so each analysis checks out its own"""
+    
+    def __init__(self):
+        # GPU pose landmarker when POSE_TASK_MODEL is set, otherwise the CPU solutions Pose graph
+        self.landmarker = create_gpu_landmarker(POSE_TASK_MODEL) if POSE_TASK_MODEL else None
+        self.pose = None
+        self._clock_ms = 0
+        
+        if self.landmarker is None:
+            self.pose = mp.solutions.pose.Pose(
+                static_image_mode=False,
+                model_complexity=1,
+                enable_segmentation=False,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+    
+    def process(self, rgb_frame: np.ndarray, frame_interval_ms: int):
+        """Run pose inference on an RGB frame, returns its pose landmarks or None"""
+        if self.landmarker is not None:
+            # VIDEO mode needs increasing timestamps across every video this landmarker sees
+            self._clock_ms += frame_interval_ms
+            image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+            result = self.landmarker.detect_for_video(image, self._clock_ms)
+            return result.pose_landmarks[0] if result.pose_landmarks else None
+        
+        results = self.pose.process(rgb_frame)
+        return results.pose_landmarks.landmark if results.pose_landmarks else None
+    
+    def close(self):
+        """Release the pose graph"""
+        if self.landmarker is not None:
+            self.landmarker.close()
+        if self.pose is not None:
+            self.pose.close()
+
 class VisionService:
     def __init__(self):
-        # Initialize MediaPipe
+        # Initialize MediaPipe, the Pose graphs are built by init_pose_model
         self.mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,
-            enable_segmentation=False,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        
+        # Pose sessions, built by init_pose_model and checked out per analysis
+        self._pose_sessions: List[PoseSession] = []
+        self._pose_pool: queue.Queue = queue.Queue()
+        self._pose_lock = threading.Lock()
         
         # Exercise-specific parameters
         self.exercise_configs = {
@@ -49,246 +354,304 @@ class VisionService:
                 "form_checks": ["back_straight", "hip_alignment", "head_position"]
             }
         }
+        
+        # Form checks of each exercise, resolved once per analysis instead of branching per frame;
+        # missing (NaN) angles fail every comparison in them, so those checks are skipped
+        self._form_analyzers = {
+            "squats": self._analyze_squats,
+            "pushups": self._analyze_pushups,
+            "lunges": self._analyze_lunges,
+            "planks": self._analyze_planks
+        }
     
-    def calculate_angle(self, point1: Tuple[float, float], point2: Tuple[float, float], point3: Tuple[float, float]) -> float:
-        """Calculate angle between three points"""
-        try:
-            # Convert to numpy arrays
-            a = np.array(point1)
-            b = np.array(point2)
-            c = np.array(point3)
-            
-            # Calculate vectors
-            ba = a - b
-            bc = c - b
+    def init_pose_model(self):
+        """Build the pool of MediaPipe pose sessions once, later calls reuse it"""
+        with self._pose_lock:
+            if self._pose_sessions:
+                return
             
-            # Calculate angle using dot product
-            cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-            cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
-            angle = np.arccos(cosine_angle)
-            
-            return math.degrees(angle)
-        except:
-            return 0.0
+            self._pose_sessions = [PoseSession() for _ in range(POSE_POOL_SIZE)]
+            for session in self._pose_sessions:
+                self._pose_pool.put(session)
     
-    def extract_keypoints(self, landmarks) -> Dict[str, PoseKeypoint]:
-        """Extract key pose landmarks"""
-        keypoints = {}
-        
-        # Define key landmarks for exercises
-        key_landmarks = {
-            'left_shoulder': self.mp_pose.PoseLandmark.LEFT_SHOULDER,
-            'right_shoulder': self.mp_pose.PoseLandmark.RIGHT_SHOULDER,
-            'left_elbow': self.mp_pose.PoseLandmark.LEFT_ELBOW,
-            'right_elbow': self.mp_pose.PoseLandmark.RIGHT_ELBOW,
-            'left_wrist': self.mp_pose.PoseLandmark.LEFT_WRIST,
-            'right_wrist': self.mp_pose.PoseLandmark.RIGHT_WRIST,
-            'left_hip': self.mp_pose.PoseLandmark.LEFT_HIP,
-            'right_hip': self.mp_pose.PoseLandmark.RIGHT_HIP,
-            'left_knee': self.mp_pose.PoseLandmark.LEFT_KNEE,
-            'right_knee': self.mp_pose.PoseLandmark.RIGHT_KNEE,
-            'left_ankle': self.mp_pose.PoseLandmark.LEFT_ANKLE,
-            'right_ankle': self.mp_pose.PoseLandmark.RIGHT_ANKLE,
-            'nose': self.mp_pose.PoseLandmark.NOSE
-        }
+    @property
+    def pose_pool_size(self) -> int:
+        """Number of pose sessions built so far, 0 until the pool is initialized"""
+        return len(self._pose_sessions)
+    
+    @contextmanager
+    def pose_session(self) -> Iterator[PoseSession]:
+        """Check out a pose session for one analysis, waiting if all of them are in use"""
+        self.init_pose_model()
+        session = self._pose_pool.get()
+        try:
+            yield session
+        finally:
+            self._pose_pool.put(session)
+    
+    def close(self):
+        """Release the MediaPipe pose sessions"""
+        with self._pose_lock:
+            for session in self._pose_sessions:
+                session.close()
+            self._pose_sessions = []
+            self._pose_pool = queue.Queue()
+    
+    def extract_keypoints(self, landmarks, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Extract key pose landmarks (a sequence of MediaPipe landmarks) into a (13, 4) array of x, y, z, visibility rows ordered as KEYPOINT_NAMES"""
+        if out is None:
+            out = np.empty((len(KEYPOINT_NAMES), 4), dtype=KEYPOINT_DTYPE)
         
-        for name, landmark_id in key_landmarks.items():
-            landmark = landmarks.landmark[landmark_id]
-            keypoints[name] = PoseKeypoint(
-                x=landmark.x,
-                y=landmark.y,
-                z=landmark.z,
-                visibility=landmark.visibility
-            )
+        # Written in place so a preallocated buffer can be reused across frames
+        for row, landmark_id in enumerate(LANDMARK_IDS):
+            landmark = landmarks[landmark_id]
+            out[row, 0] = landmark.x
+            out[row, 1] = landmark.y
+            out[row, 2] = landmark.z
+            out[row, 3] = landmark.visibility
         
-        return keypoints
+        return out
     
-    def calculate_exercise_angles(self, keypoints: Dict[str, PoseKeypoint], exercise_type: str) -> Dict[str, float]:
-        """Calculate key angles for specific exercise"""
-        angles = {}
+    def _analyze_squats(self, keypoints: np.ndarray, angles: Dict[str, float]) -> Tuple[float, List[str]]:
+        """Squat form checks: knee alignment, depth and back position"""
+        feedback = []
+        form_score = 1.0
         
-        try:
-            if exercise_type == "squats":
-                # Knee angles
-                angles['left_knee'] = self.calculate_angle(
-                    (keypoints['left_hip'].x, keypoints['left_hip'].y),
-                    (keypoints['left_knee'].x, keypoints['left_knee'].y),
-                    (keypoints['left_ankle'].x, keypoints['left_ankle'].y)
-                )
-                angles['right_knee'] = self.calculate_angle(
-                    (keypoints['right_hip'].x, keypoints['right_hip'].y),
-                    (keypoints['right_knee'].x, keypoints['right_knee'].y),
-                    (keypoints['right_ankle'].x, keypoints['right_ankle'].y)
-                )
-                # Hip angles
-                angles['left_hip'] = self.calculate_angle(
-                    (keypoints['left_shoulder'].x, keypoints['left_shoulder'].y),
-                    (keypoints['left_hip'].x, keypoints['left_hip'].y),
-                    (keypoints['left_knee'].x, keypoints['left_knee'].y)
-                )
-                
-            elif exercise_type == "pushups":
-                # Elbow angles
-                angles['left_elbow'] = self.calculate_angle(
-                    (keypoints['left_shoulder'].x, keypoints['left_shoulder'].y),
-                    (keypoints['left_elbow'].x, keypoints['left_elbow'].y),
-                    (keypoints['left_wrist'].x, keypoints['left_wrist'].y)
-                )
-                angles['right_elbow'] = self.calculate_angle(
-                    (keypoints['right_shoulder'].x, keypoints['right_shoulder'].y),
-                    (keypoints['right_elbow'].x, keypoints['right_elbow'].y),
-                    (keypoints['right_wrist'].x, keypoints['right_wrist'].y)
-                )
-                # Body alignment
-                angles['body_angle'] = self.calculate_angle(
-                    (keypoints['left_shoulder'].x, keypoints['left_shoulder'].y),
-                    (keypoints['left_hip'].x, keypoints['left_hip'].y),
-                    (keypoints['left_ankle'].x, keypoints['left_ankle'].y)
-                )
-                
-            elif exercise_type == "lunges":
-                # Front knee angle (assume left leg is front)
-                angles['front_knee'] = self.calculate_angle(
-                    (keypoints['left_hip'].x, keypoints['left_hip'].y),
-                    (keypoints['left_knee'].x, keypoints['left_knee'].y),
-                    (keypoints['left_ankle'].x, keypoints['left_ankle'].y)
-                )
-                # Back knee angle
-                angles['back_knee'] = self.calculate_angle(
-                    (keypoints['right_hip'].x, keypoints['right_hip'].y),
-                    (keypoints['right_knee'].x, keypoints['right_knee'].y),
-                    (keypoints['right_ankle'].x, keypoints['right_ankle'].y)
-                )
-                
-            elif exercise_type == "planks":
-                # Back straight angle
-                angles['back_angle'] = self.calculate_angle(
-                    (keypoints['left_shoulder'].x, keypoints['left_shoulder'].y),
-                    (keypoints['left_hip'].x, keypoints['left_hip'].y),
-                    (keypoints['left_ankle'].x, keypoints['left_ankle'].y)
-                )
-                # Elbow angles for plank support
-                angles['left_elbow'] = self.calculate_angle(
-                    (keypoints['left_shoulder'].x, keypoints['left_shoulder'].y),
-                    (keypoints['left_elbow'].x, keypoints['left_elbow'].y),
-                    (keypoints['left_wrist'].x, keypoints['left_wrist'].y)
-                )
-                
-        except Exception as e:
-            print(f"Error calculating angles: {e}")
+        # Check knee alignment
+        if 'left_knee' in angles and 'right_knee' in angles:
+            knee_diff = abs(angles['left_knee'] - angles['right_knee'])
+            if knee_diff > 15:
+                feedback.append("Keep knees aligned")
+                form_score -= 0.2
         
-        return angles
+        # Check depth
+        avg_knee_angle = (angles.get('left_knee', 180) + angles.get('right_knee', 180)) / 2
+        if avg_knee_angle > 120:
+            feedback.append("Squat deeper for better range of motion")
+            form_score -= 0.1
+        elif avg_knee_angle < 70:
+            feedback.append("Don't squat too deep")
+            form_score -= 0.1
+            
+        # Check back position
+        if keypoints[KEYPOINT_INDEX['left_shoulder'], 1] > keypoints[KEYPOINT_INDEX['left_hip'], 1]:
+            feedback.append("Keep chest up and back straight")
+            form_score -= 0.2
+        
+        return max(0.0, form_score), feedback
     
-    def analyze_form(self, keypoints: Dict[str, PoseKeypoint], angles: Dict[str, float], exercise_type: str) -> Tuple[float, List[str]]:
-        """Analyze exercise form and provide feedback"""
+    def _analyze_pushups(self, keypoints: np.ndarray, angles: Dict[str, float]) -> Tuple[float, List[str]]:
+        """Push-up form checks: elbow and body alignment"""
         feedback = []
         form_score = 1.0
         
-        if exercise_type == "squats":
-            # Check knee alignment
-            if 'left_knee' in angles and 'right_knee' in angles:
-                knee_diff = abs(angles['left_knee'] - angles['right_knee'])
-                if knee_diff > 15:
-                    feedback.append("Keep knees aligned")
-                    form_score -= 0.2
-            
-            # Check depth
-            avg_knee_angle = (angles.get('left_knee', 180) + angles.get('right_knee', 180)) / 2
-            if avg_knee_angle > 120:
-                feedback.append("Squat deeper for better range of motion")
-                form_score -= 0.1
-            elif avg_knee_angle < 70:
-                feedback.append("Don't squat too deep")
-                form_score -= 0.1
-                
-            # Check back position
-            if keypoints['left_shoulder'].y > keypoints['left_hip'].y:
-                feedback.append("Keep chest up and back straight")
+        # Check elbow alignment
+        if 'left_elbow' in angles and 'right_elbow' in angles:
+            elbow_diff = abs(angles['left_elbow'] - angles['right_elbow'])
+            if elbow_diff > 20:
+                feedback.append("Keep elbows aligned")
                 form_score -= 0.2
         
-        elif exercise_type == "pushups":
-            # Check elbow alignment
-            if 'left_elbow' in angles and 'right_elbow' in angles:
-                elbow_diff = abs(angles['left_elbow'] - angles['right_elbow'])
-                if elbow_diff > 20:
-                    feedback.append("Keep elbows aligned")
-                    form_score -= 0.2
-            
-            # Check body alignment
-            if 'body_angle' in angles:
-                if angles['body_angle'] < 160:
-                    feedback.append("Keep body straight - no sagging hips")
-                    form_score -= 0.3
-                elif angles['body_angle'] > 190:
-                    feedback.append("Lower your hips")
-                    form_score -= 0.2
-        
-        elif exercise_type == "lunges":
-            # Check front knee position
-            if 'front_knee' in angles:
-                if angles['front_knee'] < 80:
-                    feedback.append("Don't let front knee go too far forward")
-                    form_score -= 0.2
-                elif angles['front_knee'] > 110:
-                    feedback.append("Lunge deeper for better activation")
-                    form_score -= 0.1
-        
-        elif exercise_type == "planks":
-            # Check back alignment
-            if 'back_angle' in angles:
-                if angles['back_angle'] < 160:
-                    feedback.append("Straighten your back")
-                    form_score -= 0.3
-                elif angles['back_angle'] > 190:
-                    feedback.append("Don't arch your back")
-                    form_score -= 0.2
-            
-            # Check hip position
-            if keypoints['left_hip'].y < keypoints['left_shoulder'].y:
+        # Check body alignment
+        if 'body_angle' in angles:
+            if angles['body_angle'] < 160:
+                feedback.append("Keep body straight - no sagging hips")
+                form_score -= 0.3
+            elif angles['body_angle'] > 190:
                 feedback.append("Lower your hips")
                 form_score -= 0.2
         
-        form_score = max(0.0, form_score)
-        return form_score, feedback
+        return max(0.0, form_score), feedback
     
-    def count_repetitions(self, exercise_type: str, angles: Dict[str, float], previous_state: Dict) -> Tuple[bool, Dict]:
-        """Count repetitions based on exercise-specific logic"""
-        config = self.exercise_configs[exercise_type]
-        new_rep = False
-        
-        if exercise_type in ["squats", "pushups", "lunges"]:
-            # Get primary angle for rep counting
-            if exercise_type == "squats":
-                primary_angle = (angles.get('left_knee', 180) + angles.get('right_knee', 180)) / 2
-            elif exercise_type == "pushups":
-                primary_angle = (angles.get('left_elbow', 180) + angles.get('right_elbow', 180)) / 2
-            elif exercise_type == "lunges":
-                primary_angle = angles.get('front_knee', 180)
-            
-            # State machine for rep counting
-            if previous_state.get('position') == 'up' and primary_angle < config['rep_threshold_down']:
-                previous_state['position'] = 'down'
-            elif previous_state.get('position') == 'down' and primary_angle > config['rep_threshold_up']:
-                previous_state['position'] = 'up'
-                new_rep = True
-            elif 'position' not in previous_state:
-                previous_state['position'] = 'up' if primary_angle > config['rep_threshold_up'] else 'down'
-        
-        return new_rep, previous_state
+    def _analyze_lunges(self, keypoints: np.ndarray, angles: Dict[str, float]) -> Tuple[float, List[str]]:
+        """Lunge form checks: front knee position"""
+        feedback = []
+        form_score = 1.0
+        
+        # Check front knee position
+        if 'front_knee' in angles:
+            if angles['front_knee'] < 80:
+                feedback.append("Don't let front knee go too far forward")
+                form_score -= 0.2
+            elif angles['front_knee'] > 110:
+                feedback.append("Lunge deeper for better activation")
+                form_score -= 0.1
+        
+        return max(0.0, form_score), feedback
+    
+    def _analyze_planks(self, keypoints: np.ndarray, angles: Dict[str, float]) -> Tuple[float, List[str]]:
+        """Plank form checks: back alignment and hip position"""
+        feedback = []
+        form_score = 1.0
+        
+        # Check back alignment
+        if 'back_angle' in angles:
+            if angles['back_angle'] < 160:
+                feedback.append("Straighten your back")
+                form_score -= 0.3
+            elif angles['back_angle'] > 190:
+                feedback.append("Don't arch your back")
+                form_score -= 0.2
+        
+        # Check hip position
+        if keypoints[KEYPOINT_INDEX['left_hip'], 1] < keypoints[KEYPOINT_INDEX['left_shoulder'], 1]:
+            feedback.append("Lower your hips")
+            form_score -= 0.2
+        
+        return max(0.0, form_score), feedback
     
     def is_plank_position(self, angles: Dict[str, float]) -> bool:
         """Check if person is in correct plank position"""
         back_angle = angles.get('back_angle', 0)
         return back_angle > 160 and back_angle < 190
     
-    def analyze_video_file(self, video_path: str, exercise_type: str) -> ExerciseAnalysisResult:
-        """Analyze uploaded video file"""
+    def open_video(self, video_path: str) -> Tuple[float, int, Iterator[np.ndarray]]:
+        """Open a video file, returns (fps of the sampled frames, total_frames, iterator of sampled RGB frames)"""
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             raise ValueError("Could not open video file")
         
         fps = cap.get(cv2.CAP_PROP_FPS)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        stride = frame_stride(fps)
+        
+        # GPU decoding only pays off once decoder setup and the copy back to host memory are amortized
+        if fps > 0 and total_frames / fps >= NVDEC_MIN_DURATION and nvdec_available():
+            cap.release()
+            return fps / stride, total_frames, self._iter_nvdec_frames(video_path, stride)
+        
+        if decord_available():
+            size = analysis_frame_size(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            cap.release()
+            return fps / stride, total_frames, self._iter_decord_frames(video_path, stride, size)
+        
+        # Only reopened now, so videos decoded by NVDEC or decord don't set up a hardware decoder
+        if HW_DECODE:
+            hw_cap = open_hw_capture(video_path)
+            if hw_cap is not None:
+                cap.release()
+                cap = hw_cap
+        
+        return fps / stride, total_frames, self._iter_cv2_frames(cap, stride)
+    
+    def _iter_cv2_frames(self, cap, stride: int = 1) -> Iterator[np.ndarray]:
+        """Decode every stride-th frame on the CPU with OpenCV, yielded frames are reused after FRAME_BUFFERS more"""
+        try:
+            ret, bgr = cap.read()
+            if not ret:
+                return
+            size = analysis_frame_size(bgr.shape[1], bgr.shape[0])
+            
+            # Destination buffers are allocated once and reused by every frame
+            scaled = None if size is None else np.empty((size[1], size[0], 3), dtype=np.uint8)
+            rgb_buffers = [np.empty_like(bgr if scaled is None else scaled) for _ in range(FRAME_BUFFERS)]
+            
+            frame_index = 0
+            while ret:
+                # Downscale before the color conversion so it runs on the smaller frame
+                frame = bgr
+                if size is not None:
+                    frame = cv2.resize(bgr, size, dst=scaled, interpolation=cv2.INTER_AREA)
+                
+                # Convert BGR to RGB
+                yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_buffers[frame_index % FRAME_BUFFERS])
+                frame_index += 1
+                
+                # grab() advances past skipped frames without retrieving and converting them
+                for _ in range(stride - 1):
+                    if not cap.grab():
+                        return
+                ret, bgr = cap.read(bgr)
+        finally:
+            cap.release()
+    
+    def _iter_decord_frames(self, video_path: str, stride: int = 1, size: Optional[Tuple[int, int]] = None) -> Iterator[np.ndarray]:
+        """Decode every stride-th frame on the CPU with decord, already RGB and downscaled to size"""
+        from decord import VideoReader, cpu
+        
+        if size is None:
+            reader = VideoReader(video_path, ctx=cpu(0))
+        else:
+            reader = VideoReader(video_path, ctx=cpu(0), width=size[0], height=size[1])
+        
+        num_frames = len(reader)
+        batch_span = DECORD_BATCH_SIZE * stride
+        for start in range(0, num_frames, batch_span):
+            yield from reader.get_batch(range(start, min(start + batch_span, num_frames), stride)).asnumpy()
+    
+    def _prefetch_frames(self, frames: Iterator[np.ndarray]) -> Iterator[np.ndarray]:
+        """Decode frames on a background thread so decoding overlaps pose inference"""
+        frame_queue = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+        stopped = threading.Event()
+        done = object()
+        
+        def put(item) -> bool:
+            # Give up once the consumer has stopped, instead of blocking on a full queue forever
+            while not stopped.is_set():
+                try:
+                    frame_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        
+        def produce():
+            try:
+                for frame in frames:
+                    if not put(frame):
+                        break
+            except Exception as e:
+                put(e)
+            finally:
+                # Closing the decode iterator releases the capture on this thread
+                frames.close()
+                put(done)
+        
+        producer = threading.Thread(target=produce, name="vision-decode", daemon=True)
+        producer.start()
+        try:
+            while (item := frame_queue.get()) is not done:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+            producer.join()
+    
+    def _iter_nvdec_frames(self, video_path: str, stride: int = 1) -> Iterator[np.ndarray]:
+        """Decode every stride-th frame on the GPU (NVDEC) with torchcodec"""
+        import torch.nn.functional as F
+        from torchcodec.decoders import VideoDecoder
+        
+        decoder = VideoDecoder(video_path, device="cuda")
+        num_frames = len(decoder)
+        size = analysis_frame_size(decoder.metadata.width, decoder.metadata.height)
+        batch_span = NVDEC_BATCH_SIZE * stride
+        for start in range(0, num_frames, batch_span):
+            batch = decoder.get_frames_in_range(start, min(start + batch_span, num_frames), step=stride).data
+            if size is not None:
+                # Downscale on the GPU so only the smaller frames are copied back
+                batch = F.interpolate(batch.float(), size=(size[1], size[0]), mode="area").round().byte()
+            # MediaPipe runs on the CPU, so each batch is copied back once as NHWC RGB
+            yield from batch.permute(0, 2, 3, 1).contiguous().cpu().numpy()
+    
+    def analyze_video_file(self, video_path: str, exercise_type: str) -> ExerciseAnalysisResult:
+        """Analyze uploaded video file"""
+        # The last item produced by the analysis is the full result
+        return deque(self.iter_video_analysis(video_path, exercise_type), maxlen=1)[0]
+    
+    def iter_video_analysis(self, video_path: str, exercise_type: str) -> Iterator[Union[RepetitionData, PlankData, ExerciseAnalysisResult]]:
+        """Analyze uploaded video file, yielding each rep or plank session as it completes and the full result last"""
+        # The session stays checked out until the analysis finishes or the generator is closed
+        with self.pose_session() as pose:
+            yield from self._iter_session_analysis(pose, video_path, exercise_type)
+    
+    def _iter_session_analysis(self, pose: PoseSession, video_path: str, exercise_type: str) -> Iterator[Union[RepetitionData, PlankData, ExerciseAnalysisResult]]:
+        """iter_video_analysis with a checked out pose session"""
+        fps, total_frames, frames = self.open_video(video_path)
+        # MediaPipe releases the GIL during inference, so the decode thread runs alongside it
+        frames = self._prefetch_frames(frames)
+        frame_interval_ms = max(1, round(1000 / fps)) if fps > 0 else 1
         
         # Analysis variables
         frame_count = 0
@@ -298,31 +661,66 @@ class VisionService:
         form_feedback = []
         
         rep_count = 0
-        rep_state = {}
+        rep_position = POSITION_UNKNOWN
         plank_start_time = None
-        current_plank_feedback = []
+        # Insertion-ordered set of the current plank session's feedback messages
+        current_plank_feedback: Dict[str, None] = {}
         
-        form_scores = []
+        form_stats = RunningStats()
+        rep_stats = RunningStats()
+        best_rep_quality = None
+        total_plank_time = 0.0
+        recent_form_scores = deque(maxlen=PLANK_FORM_WINDOW)
         start_time = time.time()
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        # Keypoints are buffered per window so the angles of all its frames are computed in one call;
+        # the buffer is allocated once and overwritten by every window
+        angle_names, _ = EXERCISE_ANGLES[exercise_type]
+        angle_indices = EXERCISE_ANGLE_INDICES[exercise_type]
+        config = self.exercise_configs[exercise_type]
+        rep_threshold_down = config.get("rep_threshold_down", 0)
+        rep_threshold_up = config.get("rep_threshold_up", 0)
+        rep_columns = EXERCISE_REP_ANGLE_COLUMNS.get(exercise_type)
+        analyze_form = self._form_analyzers[exercise_type]
+        window_frames = []
+        window_keypoints = np.empty((ANGLE_WINDOW, len(KEYPOINT_NAMES), 4), dtype=KEYPOINT_DTYPE)
+        
+        # The trailing None flushes the last, partial window
+        for rgb_frame in chain(frames, (None,)):
+            if rgb_frame is not None:
+                frame_count += 1
+                pose_landmarks = pose.process(rgb_frame, frame_interval_ms)
+                
+                if pose_landmarks:
+                    poses_detected += 1
+                    self.extract_keypoints(pose_landmarks, window_keypoints[len(window_frames)])
+                    window_frames.append(frame_count)
+                
+                if len(window_frames) < ANGLE_WINDOW:
+                    continue
             
-            frame_count += 1
-            timestamp = frame_count / fps
+            if not window_frames:
+                continue
             
-            # Convert BGR to RGB
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.pose.process(rgb_frame)
+            # (W, 13, 4) keypoints -> (W, K) angles
+            window_angles = visible_joint_angles(window_keypoints[:len(window_frames), angle_indices])
+            # Primary rep angle of every frame, gathered by column instead of looked up by name,
+            # then the whole window goes through the rep state machine in one call
+            if rep_columns is not None:
+                window_primary = window_angles[:, rep_columns].mean(axis=1)
+                rep_position, window_reps = count_reps(rep_position, window_primary, rep_threshold_down, rep_threshold_up)
+                window_reps = window_reps.tolist()
+            else:
+                window_reps = repeat(False)
             
-            if results.pose_landmarks:
-                poses_detected += 1
-                keypoints = self.extract_keypoints(results.pose_landmarks)
-                angles = self.calculate_exercise_angles(keypoints, exercise_type)
-                form_score, feedback = self.analyze_form(keypoints, angles, exercise_type)
-                form_scores.append(form_score)
+            for frame_number, keypoints, frame_angles, new_rep in zip(
+                window_frames, window_keypoints, window_angles.tolist(), window_reps
+            ):
+                timestamp = frame_number / fps
+                angles = dict(zip(angle_names, frame_angles))
+                form_score, feedback = analyze_form(keypoints, angles)
+                form_stats.add(form_score)
+                recent_form_scores.append(form_score)
                 
                 # Add timestamped feedback
                 if feedback:
@@ -334,53 +732,65 @@ class VisionService:
                         ))
                 
                 if exercise_type != "planks":
-                    # Count repetitions
-                    new_rep, rep_state = self.count_repetitions(exercise_type, angles, rep_state)
+                    # Repetitions were counted for the whole window above
                     if new_rep:
                         rep_count += 1
-                        repetitions.append(RepetitionData(
+                        rep_stats.add(form_score)
+                        if best_rep_quality is None or form_score > best_rep_quality:
+                            best_rep_quality = form_score
+                        repetition = RepetitionData(
                             rep_number=rep_count,
                             timestamp=timestamp,
                             form_quality=form_score,
                             feedback=feedback
-                        ))
+                        )
+                        repetitions.append(repetition)
+                        yield repetition
                 else:
                     # Handle plank timing
-                    in_plank = self.is_plank_position(angles)
+                    # A hidden back keeps the current plank state instead of ending or starting a session
+                    if math.isnan(angles['back_angle']):
+                        in_plank = plank_start_time is not None
+                    else:
+                        in_plank = self.is_plank_position(angles)
                     if in_plank and plank_start_time is None:
                         plank_start_time = timestamp
-                        current_plank_feedback = []
+                        current_plank_feedback.clear()
                     elif not in_plank and plank_start_time is not None:
                         duration = timestamp - plank_start_time
-                        plank_sessions.append(PlankData(
+                        plank_session = PlankData(
                             start_time=plank_start_time,
                             end_time=timestamp,
                             duration=duration,
-                            form_quality=np.mean(form_scores[-10:]) if form_scores else 0.5,
-                            feedback=list(set(current_plank_feedback))
-                        ))
+                            form_quality=sum(recent_form_scores) / len(recent_form_scores),
+                            feedback=list(current_plank_feedback)
+                        )
+                        plank_sessions.append(plank_session)
+                        total_plank_time += duration
+                        yield plank_session
                         plank_start_time = None
                     
                     if in_plank:
-                        current_plank_feedback.extend(feedback)
+                        current_plank_feedback.update(dict.fromkeys(feedback))
+            
+            window_frames = []
         
         # Handle ongoing plank at end of video
         if exercise_type == "planks" and plank_start_time is not None:
             duration = (frame_count / fps) - plank_start_time
-            plank_sessions.append(PlankData(
+            plank_session = PlankData(
                 start_time=plank_start_time,
                 end_time=frame_count / fps,
                 duration=duration,
-                form_quality=np.mean(form_scores[-10:]) if form_scores else 0.5,
-                feedback=list(set(current_plank_feedback))
-            ))
-        
-        cap.release()
+                form_quality=sum(recent_form_scores) / len(recent_form_scores) if recent_form_scores else 0.5,
+                feedback=list(current_plank_feedback)
+            )
+            plank_sessions.append(plank_session)
+            total_plank_time += duration
+            yield plank_session
         
         # Calculate final metrics
-        avg_form_score = np.mean(form_scores) if form_scores else 0.0
-        total_plank_time = sum(session.duration for session in plank_sessions)
-        best_rep_quality = max([rep.form_quality for rep in repetitions]) if repetitions else None
+        avg_form_score = form_stats.mean
         
         # Generate overall feedback
         overall_feedback = []
@@ -396,9 +806,10 @@ class VisionService:
         elif exercise_type == "planks" and total_plank_time > 0:
             overall_feedback.append(f"Held plank for {total_plank_time:.1f} seconds total")
         
-        return ExerciseAnalysisResult(
+        yield ExerciseAnalysisResult(
             exercise_type=exercise_type,
             total_frames=total_frames,
+            analyzed_frames=frame_count,
             frames_with_pose=poses_detected,
             analysis_duration=time.time() - start_time,
             total_reps=rep_count if exercise_type != "planks" else None,
@@ -409,15 +820,14 @@ class VisionService:
             overall_feedback=overall_feedback,
             form_feedback=form_feedback,
             best_rep_quality=best_rep_quality,
-            consistency_score=1.0 - (np.std([rep.form_quality for rep in repetitions]) if repetitions else 0)
+            consistency_score=1.0 - rep_stats.std
         )
     
     def check_service_health(self) -> Dict[str, Any]:
-        """Check if MediaPipe and OpenCV are working"""
+        """Check if MediaPipe and OpenCV are working and report the analysis pool"""
         try:
-            # Test MediaPipe
-            mp_test = mp.solutions.pose.Pose()
-            mp_available = True
+            # Inference runs in the analysis workers, so the Pose graph is checked in one of them
+            mp_available = pose_graph_available()
         except:
             mp_available = False
         
@@ -432,8 +842,78 @@ class VisionService:
         return {
             "mediapipe_available": mp_available,
             "opencv_available": opencv_available,
-            "service_ready": mp_available and opencv_available
+            "service_ready": mp_available and opencv_available,
+            "analysis_pool_started": _analysis_pool is not None,
+            "analysis_workers": ANALYSIS_WORKERS
         }
 
+# Per-process service used by analysis pool workers
+_worker_service: Optional[VisionService] = None
+
+def _init_analysis_worker():
+    """Build a fresh VisionService, with its own Pose graph, once per worker process"""
+    global _worker_service
+    _worker_service = VisionService()
+    _worker_service.init_pose_model()
+
+def warm_up_worker() -> bool:
+    """Task that forces a pool worker to start, returns whether its Pose graph was built"""
+    return _worker_service is not None and _worker_service.pose_pool_size > 0
+
+def analyze_video_worker(video_path: str, exercise_type: str) -> ExerciseAnalysisResult:
+    """Analysis entry point run inside an analysis pool worker"""
+    return _worker_service.analyze_video_file(video_path, exercise_type)
+
+def stream_video_worker(video_path: str, exercise_type: str, conn: Connection):
+    """Streaming analysis entry point, sends each analysis item through conn followed by None"""
+    try:
+        for item in _worker_service.iter_video_analysis(video_path, exercise_type):
+            conn.send(item)
+    finally:
+        conn.send(None)
+
 # Create singleton instance
-vision_service = VisionService()
\ No newline at end of file
+vision_service = VisionService()
+
+# Workers come from a forkserver (spawn where there is none) instead of being forked from this
+# threaded process, so they never inherit its open upload files or locks held by other threads
+_ANALYSIS_POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Created on first use rather than at import; only the file path crosses the process boundary
+_analysis_pool: Optional[ProcessPoolExecutor] = None
+_analysis_pool_lock = threading.Lock()
+
+def get_analysis_pool() -> ProcessPoolExecutor:
+    """This process's analysis pool, created on the first call"""
+    global _analysis_pool
+    with _analysis_pool_lock:
+        if _analysis_pool is None:
+            _analysis_pool = ProcessPoolExecutor(
+                max_workers=ANALYSIS_WORKERS,
+                mp_context=_ANALYSIS_POOL_CONTEXT,
+                initializer=_init_analysis_worker
+            )
+        return _analysis_pool
+
+def close_analysis_pool() -> None:
+    """Stop the analysis worker processes if the pool was started"""
+    global _analysis_pool, _pose_graph_ok
+    with _analysis_pool_lock:
+        if _analysis_pool is not None:
+            _analysis_pool.shutdown(wait=False, cancel_futures=True)
+            _analysis_pool = None
+            _pose_graph_ok = False
+
+# Set once a worker of the current pool has built its Pose graph; a worker whose graph fails
+# to build breaks the pool, so every later check fails too
+POSE_PROBE_TIMEOUT = 60.0
+_pose_graph_ok = False
+
+def pose_graph_available() -> bool:
+    """Whether the analysis workers can build a Pose graph, checked by running a task in the pool"""
+    global _pose_graph_ok
+    if not _pose_graph_ok:
+        _pose_graph_ok = get_analysis_pool().submit(warm_up_worker).result(timeout=POSE_PROBE_TIMEOUT)
+    return _pose_graph_ok
@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration for production deployment.
+
+The app is imported once in the master process and the chatbot embedder is
+loaded there, so every forked worker shares the same model weights
+copy-on-write. That needs a current backend/chatbot/kb/kb.npy from
+scripts/build_kb.py; without one, each worker loads the model after the fork.
+
+Usage:
+    gunicorn main:app -c gunicorn.conf.py
+"""
+
+import os
+
+# Load the chatbot embedder in the master before forking workers
+os.environ.setdefault("PRELOAD_EMBEDDER", "True")
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+# Each worker runs its own pool of VISION_ANALYSIS_WORKERS video analysis processes, by default
+# half the cores divided by WEB_CONCURRENCY (see backend/vision/service.py)
+workers = int(os.getenv("WEB_CONCURRENCY", 4))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
@@ -1,91 +1,325 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+import asyncio
 import os
-from dotenv import load_dotenv
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict
+from starlette.types import Receive, Scope, Send
 
-# Load environment variables
-load_dotenv()
+# Load environment variables from .env in development; deployments set them directly,
+# so python-dotenv is only imported when the file exists
+ENV_PATH = Path(__file__).resolve().parent / ".env"
+if ENV_PATH.is_file():
+    from dotenv import load_dotenv
+    load_dotenv(ENV_PATH)
+DEBUG = os.getenv("DEBUG", "True").lower() == "true"
+
+# Reported by the app, /, /health and /stats; the static payloads and their ETags follow it
+API_VERSION = "4.0.0"
 
 # Import all module routers
 from backend.recommender.routes import router as recommender_router
-from backend.vision.routes import router as vision_router
+from backend.vision.routes import router as vision_router, start_vision, stop_vision, NDJSON_MEDIA_TYPE
 # from backend.predictive.routes import predictive_router # <--- REMOVED
-from backend.chatbot.routes import router as chatbot_router
+from backend.chatbot.routes import router as chatbot_router, start_chatbot, stop_chatbot
+
+# Service singletons probed by /health, imported with their routers rather than per request
+from backend.vision.service import vision_service
+from backend.chatbot.service import chatbot_service
+from backend.utils.helpers import json_bytes, json_etag, gzip_bytes, cached_json_response
+
+_vision_check = vision_service.check_service_health
+_chatbot_check = chatbot_service.check_service_health
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start the modules' background work and warm the services up before serving requests"""
+    await start_chatbot()
+    await start_vision()
+    
+    # Checks the Pose graph in an analysis worker and caches the first /health result
+    await health_check()
+    
+    # Generate the OpenAPI schema now so the first /docs visit doesn't wait for it;
+    # app.openapi() caches it on app.openapi_schema
+    if app.openapi_url:
+        app.openapi()
+    
+    yield
+    
+    await stop_chatbot()
+    await stop_vision()
 
 # Create FastAPI instance
 app = FastAPI(
     title="Family Care Fitness AI API",
     # EDITED: Updated description to remove 'predictive analytics'
     description="A comprehensive AI-powered fitness and health platform with personalized recommendations, computer vision analysis, and AI coaching chatbot",
-    version="4.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc"
+    version=API_VERSION,
+    # Interactive docs and the OpenAPI schema are only served in debug mode
+    docs_url="/docs" if DEBUG else None,
+    redoc_url=None,
+    openapi_url="/openapi.json" if DEBUG else None,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Add CORS middleware
-allowed_origins = os.getenv("ALLOWED_ORIGINS", "*").split(",")
+# Add CORS middleware, browsers may cache preflight results for a day (Chrome caps it at 2 hours)
+# Comma-separated, whitespace around entries is ignored
+_origins_env = os.getenv("ALLOWED_ORIGINS", "*")
+if _origins_env.strip() == "*":
+    allowed_origins = ["*"]
+else:
+    allowed_origins = list(dict.fromkeys(origin.strip() for origin in _origins_env.split(",") if origin.strip()))
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # The routers only expose GET and POST; Starlette always adds the safelisted headers (Accept, Content-Type, ...)
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
 )
 
+class NoStreamGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that skips NDJSON analysis streams, its compressor would hold their lines back"""
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            accept = next((value for name, value in scope["headers"] if name == b"accept"), b"")
+            if NDJSON_MEDIA_TYPE.encode() in accept:
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
+
+# Compress JSON responses of 512 bytes and up, analysis results shrink several times over
+app.add_middleware(NoStreamGZipMiddleware, minimum_size=512, compresslevel=6)
+
 # Include all routers
 app.include_router(recommender_router)
 app.include_router(vision_router)
 # app.include_router(predictive_router) # <--- REMOVED
 app.include_router(chatbot_router)
 
+# Static payloads, built once at import
+ROOT_INFO = {
+    "message": "Welcome to Family Care Fitness AI API",
+    "version": API_VERSION,
+    "description": "Complete fitness and health management platform with AI coaching",
+    "features": {
+        "recommender": [
+            "Personalized fitness and nutrition recommendations",
+            "Calorie calculation based on goals and activity",
+            "Meal planning with dietary preferences and allergies",
+            "Workout suggestions tailored to fitness goals"
+        ],
+        "vision": [
+            "Computer vision exercise form analysis via video upload",
+            "Automatic repetition counting for 4 exercise types",
+            "Real-time form feedback and quality scoring",
+            "Support for squats, push-ups, lunges, and planks"
+        ],
+        # REMOVED: "predictive" block
+        "chatbot": [
+            "AI-powered fitness coach for personalized advice",
+            "Natural language conversation interface",
+            "RAG-based knowledge retrieval for accurate responses",
+            "Motivational support and guidance"
+        ]
+    },
+    "endpoints": {
+        "docs": "/docs",
+        "health": "/health",
+        "liveness": "/livez",
+        "readiness": "/readyz",
+        # Taken from the routers so the listed paths can't drift from the mounted ones
+        "modules": {
+            "recommender": recommender_router.prefix,
+            "vision": vision_router.prefix,
+            # REMOVED: "predictive": "/predictive",
+            "chatbot": chatbot_router.prefix
+        }
+    },
+    "key_capabilities": [
+        "🎯 Smart Recommendations",
+        "👁️ AI Vision Analysis",
+        # REMOVED: "📈 Predictive Analytics",
+        "💬 AI Fitness Coach",
+        "🏥 Health Monitoring",
+        "📱 RESTful API Design"
+    ]
+}
+
+MODULES_INFO = {
+    "total_modules": 3, # EDITED: 4 -> 3
+    "modules": {
+        "recommender": {
+            "name": "Fitness & Nutrition Recommender",
+            "description": "Personalized recommendations based on user profile",
+            "endpoints": [
+                "POST /recommender/recommendations",
+                "POST /recommender/recommendations/batch",
+                "GET /recommender/health",
+                "GET /recommender/info"
+            ],
+            "key_features": [
+                "BMR/TDEE calculation",
+                "Goal-based calorie adjustment",
+                "Diet preference filtering",
+                "Allergy-aware meal selection"
+            ]
+        },
+        "vision": {
+            "name": "Computer Vision Exercise Analysis",
+            "description": "AI-powered exercise form analysis and rep counting",
+            "endpoints": [
+                "POST /vision/analyze-video",
+                "GET /vision/health",
+                "GET /vision/info",
+                "GET /vision/exercises/{type}/info"
+            ],
+            "key_features": [
+                "Pose detection with MediaPipe",
+                "Exercise form analysis",
+                "Automatic repetition counting",
+                "Real-time feedback generation"
+            ],
+            "supported_exercises": ["squats", "pushups", "lunges", "planks"]
+        },
+        # REMOVED: "predictive" block
+        "chatbot": {
+            "name": "AI Fitness Coach Chatbot",
+            "description": "Conversational AI for fitness advice and motivation",
+            "endpoints": [
+                "POST /chatbot/chat",
+                "GET /chatbot/health",
+                "GET /chatbot/info",
+                "GET /chatbot/examples"
+            ],
+            "key_features": [
+                "Natural language understanding",
+                "RAG-based knowledge retrieval",
+                "Fitness expertise (Llama 3.1 8B)",
+                "Motivational coaching style"
+            ],
+            "capabilities": [
+                "Workout programming",
+                "Nutrition guidance",
+                "Exercise techniques",
+                "Motivation support"
+            ]
+        }
+    },
+    "integration_benefits": [
+        "Complete fitness ecosystem in one API",
+        "Cross-module data compatibility",
+        "Comprehensive health monitoring",
+        "AI-powered personalization",
+        "Scalable microservice architecture"
+    ]
+}
+
+# Total Endpoints: 4 (recommender) + 4 (vision) + 4 (chatbot) + 6 (system: /, /health, /livez, /readyz, /modules, /stats) = 18
+API_STATS = {
+    "api_version": API_VERSION,
+    "total_endpoints": 18,
+    "endpoint_breakdown": {
+        "recommender": 4,
+        "vision": 4,
+        # REMOVED: "predictive": 6,
+        "chatbot": 4,
+        "system": 6 # EDITED: 3 -> 6 for /, /health, /livez, /readyz, /modules, /stats
+    },
+    "supported_features": {
+        "exercise_types": 4,
+        "diet_preferences": 4,
+        "activity_levels": 5,
+        # REMOVED: "prediction_timeframes": 3,
+        "health_risk_categories": 4,
+        "chatbot_topics": 15
+    },
+    "technical_stack": [
+        "FastAPI",
+        "Pydantic",
+        "MediaPipe",
+        "OpenCV",
+        "NumPy",
+        "Groq API",
+        "Sentence Transformers",
+        "FAISS"
+    ],
+    "ai_models": [
+        "MediaPipe Pose Detection",
+        "Llama 3.1 8B (Groq)",
+        "all-MiniLM-L6-v2 (Embeddings)"
+    ],
+    "data_processing": {
+        "real_time_analysis": True,
+        "batch_processing": True,
+        "file_upload_support": True,
+        "form_validation": True,
+        "conversational_ai": True,
+        "rag_enabled": True
+    }
+}
+
+# Serialized once as well, so handlers skip JSON encoding entirely
+_ROOT_BYTES = json_bytes(ROOT_INFO)
+_MODULES_BYTES = json_bytes(MODULES_INFO)
+_STATS_BYTES = json_bytes(API_STATS)
+
+# The static bodies only change with a new API version, so clients may cache them for an hour
+STATIC_MAX_AGE = 3600
+_ROOT_ETAG = json_etag(_ROOT_BYTES)
+_MODULES_ETAG = json_etag(_MODULES_BYTES)
+_STATS_ETAG = json_etag(_STATS_BYTES)
+
+# Compressed once here; GZipMiddleware passes responses that already have a Content-Encoding through
+_ROOT_GZIP = gzip_bytes(_ROOT_BYTES)
+_MODULES_GZIP = gzip_bytes(_MODULES_BYTES)
+_STATS_GZIP = gzip_bytes(_STATS_BYTES)
+
 @app.get("/")
-async def root():
+async def root(request: Request):
     """
     Root endpoint - API welcome message with complete feature overview
     """
+    return cached_json_response(request, _ROOT_BYTES, _ROOT_ETAG, STATIC_MAX_AGE, _ROOT_GZIP)
+
+# /health results are reused for a few seconds, probes and load balancers poll it constantly
+HEALTH_TTL = 5.0
+_health_cache: Dict[str, Any] = {"expires": 0.0, "data": None}
+_health_lock = asyncio.Lock()
+
+def _check_vision() -> Dict[str, Any]:
+    """Vision service status and components for /health"""
+    vision_health = _vision_check()
+    
     return {
-        "message": "Welcome to Family Care Fitness AI API",
-        "version": "4.0.0",
-        "description": "Complete fitness and health management platform with AI coaching",
-        "features": {
-            "recommender": [
-                "Personalized fitness and nutrition recommendations",
-                "Calorie calculation based on goals and activity",
-                "Meal planning with dietary preferences and allergies",
-                "Workout suggestions tailored to fitness goals"
-            ],
-            "vision": [
-                "Computer vision exercise form analysis via video upload",
-                "Automatic repetition counting for 4 exercise types",
-                "Real-time form feedback and quality scoring",
-                "Support for squats, push-ups, lunges, and planks"
-            ],
-            # REMOVED: "predictive" block
-            "chatbot": [
-                "AI-powered fitness coach for personalized advice",
-                "Natural language conversation interface",
-                "RAG-based knowledge retrieval for accurate responses",
-                "Motivational support and guidance"
-            ]
-        },
-        "endpoints": {
-            "docs": "/docs",
-            "health": "/health",
-            "modules": {
-                "recommender": "/recommender",
-                "vision": "/vision",
-                # REMOVED: "predictive": "/predictive",
-                "chatbot": "/chatbot"
-            }
-        },
-        "key_capabilities": [
-            "🎯 Smart Recommendations",
-            "👁️ AI Vision Analysis",
-            # REMOVED: "📈 Predictive Analytics",
-            "💬 AI Fitness Coach",
-            "🏥 Health Monitoring",
-            "📱 RESTful API Design"
-        ]
+        "status": "healthy" if vision_health["service_ready"] else "degraded",
+        "components": {
+            "mediapipe": vision_health["mediapipe_available"],
+            "opencv": vision_health["opencv_available"],
+            # Analysis workers per web worker; the Pose check starts the pool's first worker
+            "analysis_pool_started": vision_health["analysis_pool_started"],
+            "analysis_workers": vision_health["analysis_workers"]
+        }
+    }
+
+def _check_chatbot() -> Dict[str, Any]:
+    """Chatbot service status and components for /health"""
+    chatbot_health = _chatbot_check()
+    
+    return {
+        "status": "healthy" if chatbot_health["service_ready"] else "degraded",
+        "components": {
+            "groq_api": chatbot_health["groq_api_configured"],
+            "embedder": chatbot_health["embedder_loaded"]
+        }
     }
 
 @app.get("/health")
@@ -93,43 +327,58 @@ async def health_check():
     """
     Comprehensive health check for all services
     """
+    if time.monotonic() < _health_cache["expires"]:
+        return _health_cache["data"]
+    
+    # Concurrent requests on an expired cache wait for a single recomputation
+    async with _health_lock:
+        if time.monotonic() >= _health_cache["expires"]:
+            _health_cache["data"] = await _compute_health()
+            _health_cache["expires"] = time.monotonic() + HEALTH_TTL
+        return _health_cache["data"]
+
+@app.get("/livez")
+async def liveness_check():
+    """
+    Liveness probe - answers as long as the process serves requests, without checking any service
+    """
+    return PlainTextResponse("OK")
+
+@app.get("/readyz")
+async def readiness_check():
+    """
+    Readiness probe - the /health checks, with 503 while any service reports an error
+    """
+    health_status = await health_check()
+    status_code = 503 if "error" in health_status["services"].values() else 200
+    return ORJSONResponse(health_status, status_code=status_code)
+
+async def _compute_health() -> Dict[str, Any]:
+    """Probe every service and build the /health response"""
     health_status = {
         "status": "healthy",
         "message": "Family Care Fitness AI API is running",
-        "version": "4.0.0",
+        "version": API_VERSION,
         "services": {
             "recommender": "healthy",
             # REMOVED: "predictive": "healthy"
         }
     }
     
-    # Check vision service health
-    try:
-        from backend.vision.service import vision_service
-        vision_health = vision_service.check_service_health()
-        
-        health_status["services"]["vision"] = "healthy" if vision_health["service_ready"] else "degraded"
-        health_status["vision_components"] = {
-            "mediapipe": vision_health["mediapipe_available"],
-            "opencv": vision_health["opencv_available"]
-        }
-    except Exception as e:
-        health_status["services"]["vision"] = "error"
-        health_status["vision_error"] = str(e)
+    # Probe the services concurrently off the event loop, a failing probe is reported as an error
+    results = await asyncio.gather(
+        asyncio.to_thread(_check_vision),
+        asyncio.to_thread(_check_chatbot),
+        return_exceptions=True
+    )
     
-    # Check chatbot service health
-    try:
-        from backend.chatbot.service import chatbot_service
-        chatbot_health = chatbot_service.check_service_health()
-        
-        health_status["services"]["chatbot"] = "healthy" if chatbot_health["service_ready"] else "degraded"
-        health_status["chatbot_components"] = {
-            "groq_api": chatbot_health["groq_api_configured"],
-            "embedder": chatbot_health["embedder_loaded"]
-        }
-    except Exception as e:
-        health_status["services"]["chatbot"] = "error"
-        health_status["chatbot_error"] = str(e)
+    for name, result in zip(("vision", "chatbot"), results):
+        if isinstance(result, BaseException):
+            health_status["services"][name] = "error"
+            health_status[f"{name}_error"] = str(result)
+        else:
+            health_status["services"][name] = result["status"]
+            health_status[f"{name}_components"] = result["components"]
     
     # Overall status determination
     service_statuses = list(health_status["services"].values())
@@ -143,137 +392,34 @@ async def health_check():
     return health_status
 
 @app.get("/modules")
-async def get_modules_info():
+async def get_modules_info(request: Request):
     """
     Get detailed information about all available modules
     """
-    return {
-        "total_modules": 3, # EDITED: 4 -> 3
-        "modules": {
-            "recommender": {
-                "name": "Fitness & Nutrition Recommender",
-                "description": "Personalized recommendations based on user profile",
-                "endpoints": [
-                    "POST /recommender/recommendations",
-                    "GET /recommender/health",
-                    "GET /recommender/info"
-                ],
-                "key_features": [
-                    "BMR/TDEE calculation",
-                    "Goal-based calorie adjustment",
-                    "Diet preference filtering",
-                    "Allergy-aware meal selection"
-                ]
-            },
-            "vision": {
-                "name": "Computer Vision Exercise Analysis",
-                "description": "AI-powered exercise form analysis and rep counting",
-                "endpoints": [
-                    "POST /vision/analyze-video",
-                    "GET /vision/health",
-                    "GET /vision/info",
-                    "GET /vision/exercises/{type}/info"
-                ],
-                "key_features": [
-                    "Pose detection with MediaPipe",
-                    "Exercise form analysis",
-                    "Automatic repetition counting",
-                    "Real-time feedback generation"
-                ],
-                "supported_exercises": ["squats", "pushups", "lunges", "planks"]
-            },
-            # REMOVED: "predictive" block
-            "chatbot": {
-                "name": "AI Fitness Coach Chatbot",
-                "description": "Conversational AI for fitness advice and motivation",
-                "endpoints": [
-                    "POST /chatbot/chat",
-                    "GET /chatbot/health",
-                    "GET /chatbot/info",
-                    "GET /chatbot/examples"
-                ],
-                "key_features": [
-                    "Natural language understanding",
-                    "RAG-based knowledge retrieval",
-                    "Fitness expertise (Llama 3.1 8B)",
-                    "Motivational coaching style"
-                ],
-                "capabilities": [
-                    "Workout programming",
-                    "Nutrition guidance",
-                    "Exercise techniques",
-                    "Motivation support"
-                ]
-            }
-        },
-        "integration_benefits": [
-            "Complete fitness ecosystem in one API",
-            "Cross-module data compatibility",
-            "Comprehensive health monitoring",
-            "AI-powered personalization",
-            "Scalable microservice architecture"
-        ]
-    }
+    return cached_json_response(request, _MODULES_BYTES, _MODULES_ETAG, STATIC_MAX_AGE, _MODULES_GZIP)
 
 @app.get("/stats")
-async def get_api_stats():
+async def get_api_stats(request: Request):
     """
     Get API statistics and capabilities summary
     """
-    # Total Endpoints: 3 (recommender) + 4 (vision) + 4 (chatbot) + 3 (system: /, /health, /stats) = 14
-    return {
-        "api_version": "4.0.0",
-        "total_endpoints": 14, # EDITED: 20 -> 14
-        "endpoint_breakdown": {
-            "recommender": 3,
-            "vision": 4,
-            # REMOVED: "predictive": 6,
-            "chatbot": 4,
-            "system": 3 # EDITED: 2 -> 3 for /, /health, /stats (and /modules if it's considered system)
-        },
-        "supported_features": {
-            "exercise_types": 4,
-            "diet_preferences": 4,
-            "activity_levels": 5,
-            # REMOVED: "prediction_timeframes": 3,
-            "health_risk_categories": 4,
-            "chatbot_topics": 15
-        },
-        "technical_stack": [
-            "FastAPI",
-            "Pydantic",
-            "MediaPipe",
-            "OpenCV",
-            "NumPy",
-            "Groq API",
-            "Sentence Transformers",
-            "FAISS"
-        ],
-        "ai_models": [
-            "MediaPipe Pose Detection",
-            "Llama 3.1 8B (Groq)",
-            "all-MiniLM-L6-v2 (Embeddings)"
-        ],
-        "data_processing": {
-            "real_time_analysis": True,
-            "batch_processing": True,
-            "file_upload_support": True,
-            "form_validation": True,
-            "conversational_ai": True,
-            "rag_enabled": True
-        }
-    }
+    return cached_json_response(request, _STATS_BYTES, _STATS_ETAG, STATIC_MAX_AGE, _STATS_GZIP)
 
 if __name__ == "__main__":
     import uvicorn
     
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8000))
-    debug = os.getenv("DEBUG", "True").lower() == "true"
+    web_workers = 1 if DEBUG else int(os.getenv("WEB_CONCURRENCY", 4))
+    # The worker processes size their video analysis pools from it, see backend/vision/service.py
+    os.environ["WEB_CONCURRENCY"] = str(web_workers)
     
+    # reload and workers both need the app as an import string; the reloader only runs
+    # a single worker. uvloop and httptools are picked up automatically when installed
     uvicorn.run(
-        app,
+        "main:app",
         host=host,
         port=port,
-        reload=debug
+        reload=DEBUG,
+        workers=web_workers
     )
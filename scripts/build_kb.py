@@ -0,0 +1,39 @@
+"""
+Precompute the chatbot knowledge base embeddings.
+
+Encodes the static fitness knowledge texts once and writes them to
+backend/chatbot/kb/ so the chatbot service can load them at startup
+instead of running the embedding model. Re-run this script whenever
+the knowledge texts or the embedding model change.
+
+Usage:
+    python scripts/build_kb.py
+"""
+
+import importlib.util
+from pathlib import Path
+
+KB_MODULE_PATH = Path(__file__).resolve().parent.parent / "backend" / "chatbot" / "knowledge_base.py"
+
+def load_knowledge_base_module():
+    """Load knowledge_base.py directly, without importing the chatbot service singleton"""
+    spec = importlib.util.spec_from_file_location("knowledge_base", KB_MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def main():
+    kb = load_knowledge_base_module()
+
+    embedder, model_name = kb.load_embedder()
+
+    if kb.load_kb_embeddings(model_name) is not None:
+        print(f"Knowledge base embeddings for {model_name} are up to date ({kb.KB_EMBEDDINGS_PATH})")
+        return
+
+    embeddings = embedder.encode(kb.KNOWLEDGE_TEXTS)
+    kb.save_kb_embeddings(embeddings, model_name)
+    print(f"Wrote {len(kb.KNOWLEDGE_TEXTS)} {model_name} embeddings to {kb.KB_EMBEDDINGS_PATH}")
+
+if __name__ == "__main__":
+    main()